@@ -0,0 +1,317 @@
+"""
+BENCHMARK DEL NORMALIZADOR
+Desarrollado por Felipe Alexander Correa Rodríguez
+
+Genera archivos sintéticos parecidos a los exportes municipales (CSV en
+latin-1/cp1252 y XLSX, con acentos, fechas en formatos mezclados y montos del
+tipo "$ 13.843 : 4,00 hrs") y mide cada etapa de la normalización para cada
+variante (basico, universal, final):
+
+    encoding -> delimitador -> lectura -> encabezados -> datos -> escritura
+
+Cada variante corre en un proceso nuevo para que el pico de memoria (RSS) sea
+sólo suyo. Los resultados pueden guardarse como línea base y compararse en
+corridas posteriores para detectar regresiones.
+
+Uso:
+    python benchmark.py --filas 100000
+    python benchmark.py --filas 100000 --guardar-base benchmark_base.json
+    python benchmark.py --filas 100000 --comparar benchmark_base.json
+
+Códigos de salida:
+    0  sin regresiones (o sin comparar)
+    1  alguna variante quedó más lenta que la línea base más la tolerancia
+"""
+
+#...................................................... | STACK DE LIBRERÍAS
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import deteccion
+import entrada
+import instrumentacion
+import motor
+import variantes
+
+#...................................................... | CONFIGURACIÓN
+FILAS = 100_000
+SEMILLA = 2025
+REPETICIONES = 3
+TOLERANCIA = 0.10  # ..proporción de filas/segundo que se puede perder sin marcar regresión
+ETAPAS = ['encoding', 'delimitador', 'lectura', 'encabezados', 'datos', 'escritura']
+
+NOMBRES = ['José', 'María', 'Íñigo', 'Ñusta', 'Raúl', 'Verónica', 'Joaquín', 'Inés', 'Sofía', 'Andrés']
+APELLIDOS = ['Núñez', 'Muñoz', 'González', 'Peña', 'Ibáñez', "O'Higgins", 'Martínez', 'Pérez', 'Cáceres']
+COMUNAS = ['Rengo', 'Rancagua', 'San Fernando', 'Machalí', 'Graneros', 'Requínoa', 'Malloa', 'Quinta de Tilcoco']
+CALLES = ['Av. Bernardo O\'Higgins', 'Pasaje Los Aromos', 'Calle Almirante Latorre', 'Camino a Cerro Pelado']
+CARGOS = ['Auxiliar de Aseo', 'Técnico en Párvulos', 'Conductor', 'Administrativo (Contrata)', 'Jefe de Sección']
+# ..caracteres que sólo existen en cp1252 (no en latin-1)
+EXTRAS_CP1252 = ['“Honorarios”', 'Turno – Noche', 'Bono € 10']
+FORMATOS_FECHA = ['%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d.%m.%Y', '%d/%m/%y']
+
+#...................................................... | DATOS SINTÉTICOS
+def generar_datos(filas, encoding='latin-1', semilla=SEMILLA):
+    """DataFrame sintético reproducible con el estilo de los exportes municipales"""
+    azar = np.random.default_rng(semilla)
+
+    def elegir(opciones):
+        return np.asarray(opciones, dtype=object)[azar.integers(0, len(opciones), filas)]
+
+    nombres = elegir(NOMBRES) + ' ' + elegir(APELLIDOS) + ' ' + elegir(APELLIDOS)
+    direcciones = (
+        elegir(CALLES) + ' ' + azar.integers(1, 3000, filas).astype(str).astype(object)
+        + ', ' + elegir(COMUNAS)
+    )
+
+    inicio = date(1990, 1, 1)
+    dias = azar.integers(0, 35 * 365, filas)
+    formatos = elegir(FORMATOS_FECHA)
+    fechas = np.array(
+        [(inicio + timedelta(days=int(dia))).strftime(formato) for dia, formato in zip(dias, formatos)],
+        dtype=object
+    )
+
+    montos = np.array(
+        [f"$ {monto:,}".replace(',', '.') + f" : {horas},{minutos:02d} hrs"
+         for monto, horas, minutos in zip(azar.integers(1_000, 900_000, filas),
+                                          azar.integers(1, 60, filas),
+                                          azar.choice([0, 25, 50, 75], filas))],
+        dtype=object
+    )
+    sin_monto = azar.random(filas)
+    montos[sin_monto < 0.10] = 'NO TIENE'
+    montos[(sin_monto >= 0.10) & (sin_monto < 0.15)] = ''
+
+    cargos = elegir(CARGOS + EXTRAS_CP1252 if encoding == 'cp1252' else CARGOS)
+    ruts = [f"{rut:,}".replace(',', '.') + f"-{dv}"
+            for rut, dv in zip(azar.integers(5_000_000, 25_000_000, filas), elegir(list('0123456789K')))]
+
+    return pd.DataFrame({
+        'Nombre Funcionario': nombres,
+        'R.U.T.': ruts,
+        'Dirección': direcciones,
+        'Comuna': elegir(COMUNAS),
+        'Cargo': cargos,
+        'Fecha Ingreso': fechas,
+        'Monto Hora Extraordinaria': montos,
+        'Grado': azar.integers(1, 25, filas),
+    })
+
+def generar_archivo(ruta, filas, encoding='latin-1', semilla=SEMILLA):
+    """Escribe el archivo sintético; CSV con ';' en el encoding pedido o XLSX"""
+    df = generar_datos(filas, encoding, semilla)
+    if motor.es_csv(ruta):
+        df.to_csv(ruta, sep=';', index=False, encoding=encoding)
+    else:
+        df.to_excel(ruta, index=False)
+    return ruta
+
+def preparar_archivos(carpeta, filas, formatos, encodings, semilla=SEMILLA):
+    """Genera (o reutiliza) los archivos de la corrida; devuelve {nombre: ruta}"""
+    carpeta = Path(carpeta)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    archivos = {}
+    for formato in formatos:
+        for encoding in (encodings if formato == 'csv' else ['latin-1']):
+            nombre = f"sintetico_{filas}_{encoding}.csv" if formato == 'csv' else f"sintetico_{filas}.xlsx"
+            ruta = carpeta / nombre
+            if not ruta.exists():
+                print(f"Generando {ruta}...", flush=True)
+                generar_archivo(ruta, filas, encoding, semilla)
+            archivos[ruta.stem] = ruta
+    return archivos
+
+#...................................................... | MEDICIÓN
+def medir_variante(archivo, nombre_variante, lector=motor.LECTOR):
+    """
+    Corre una vez todas las etapas de una variante sobre un archivo y devuelve
+    los segundos de cada etapa, las filas procesadas y el pico de memoria.
+    Se ejecuta en un proceso aparte (ver medir).
+    """
+    variante = variantes.VARIANTES[nombre_variante]
+    tiempos = dict.fromkeys(ETAPAS, 0.0)
+    encoding = None
+
+    def etapa(nombre, funcion, *args, **kwargs):
+        inicio = time.perf_counter()
+        resultado = funcion(*args, **kwargs)
+        tiempos[nombre] = time.perf_counter() - inicio
+        return resultado
+
+    if motor.es_csv(archivo):
+        # ..como en normalizador_cli.py, las tres etapas usan el mismo mapeo del archivo
+        with entrada.ArchivoMapeado(archivo) as mapeado:
+            encoding, _ = etapa('encoding', deteccion.detectar_encoding, mapeado)
+            dialecto = etapa('delimitador', deteccion.detectar_dialecto, mapeado, encoding)
+            df = etapa('lectura', motor.leer_csv, mapeado, encoding, dialecto.delimitador,
+                       lector=lector, comillas=dialecto.comillas, **variante.opciones_lectura)
+    else:
+        df = etapa('lectura', motor.leer_excel, archivo)
+
+    df = etapa('encabezados', variante.normalizar_encabezados, df)
+    # ..incluye la clasificación de columnas de la variante, si la tiene
+    df = etapa('datos', lambda df: variante.preparar(df)(df), df)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        salida = Path(carpeta) / f"salida{Path(archivo).suffix}"
+        etapa('escritura', motor.escribir_archivo, df, salida, variante.opciones_escritura)
+
+    return {
+        'tiempos': tiempos,
+        'filas': len(df),
+        'memoria_mb': instrumentacion.memoria_pico_mb(),
+        'encoding': encoding,
+    }
+
+def medir(archivo, nombre_variante, repeticiones=REPETICIONES, lector=motor.LECTOR):
+    """
+    Repite la medición en procesos nuevos y resume: mediana de cada etapa,
+    total, filas/segundo y el mayor pico de memoria.
+    """
+    contexto = multiprocessing.get_context('spawn')
+    corridas = []
+    for _ in range(repeticiones):
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as ejecutor:
+            corridas.append(ejecutor.submit(medir_variante, str(archivo), nombre_variante, lector).result())
+
+    tiempos = {
+        nombre: statistics.median(corrida['tiempos'][nombre] for corrida in corridas)
+        for nombre in ETAPAS
+    }
+    total = sum(tiempos.values())
+    filas = corridas[0]['filas']
+    memorias = [corrida['memoria_mb'] for corrida in corridas if corrida['memoria_mb'] is not None]
+    return {
+        'tiempos': tiempos,
+        'total': total,
+        'filas': filas,
+        'filas_por_segundo': filas / total if total else 0.0,
+        'memoria_mb': max(memorias) if memorias else None,
+        'encoding': corridas[0]['encoding'],
+    }
+
+#...................................................... | LÍNEA BASE
+def entorno():
+    return {
+        'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+def guardar_base(ruta, resultados, opciones):
+    with open(ruta, 'w', encoding='utf-8') as file:
+        json.dump({'entorno': entorno(), 'opciones': opciones, 'resultados': resultados},
+                  file, indent=2, ensure_ascii=False)
+
+def comparar(resultados, base, tolerancia=TOLERANCIA):
+    """
+    Compara filas/segundo contra la línea base; devuelve (líneas del informe,
+    cantidad de regresiones). Sólo se comparan los pares archivo/variante
+    presentes en ambas corridas.
+    """
+    lineas = []
+    regresiones = 0
+    for clave, actual in resultados.items():
+        anterior = base['resultados'].get(clave)
+        if not anterior or not anterior['filas_por_segundo']:
+            lineas.append(f"{clave:<45} sin línea base")
+            continue
+        cambio = actual['filas_por_segundo'] / anterior['filas_por_segundo'] - 1
+        estado = 'OK'
+        if cambio < -tolerancia:
+            estado = 'REGRESIÓN'
+            regresiones += 1
+        lineas.append(
+            f"{clave:<45} {anterior['filas_por_segundo']:>12,.0f} -> "
+            f"{actual['filas_por_segundo']:>12,.0f} filas/s ({cambio:+.1%}) {estado}"
+        )
+    return lineas, regresiones
+
+#...................................................... | INFORME
+def formatear(clave, resultado):
+    etapas = ' '.join(f"{resultado['tiempos'][nombre]:>11.3f}" for nombre in ETAPAS)
+    memoria = f"{resultado['memoria_mb']:>9.0f}" if resultado['memoria_mb'] is not None else f"{'-':>9}"
+    return f"{clave:<45} {etapas} {resultado['total']:>9.3f} {resultado['filas_por_segundo']:>12,.0f} {memoria}"
+
+def encabezado_informe():
+    etapas = ' '.join(f"{nombre:>11}" for nombre in ETAPAS)
+    return f"{'archivo / variante':<45} {etapas} {'total s':>9} {'filas/s':>12} {'RSS MB':>9}"
+
+#...................................................... | ARGUMENTOS
+def crear_parser():
+    parser = argparse.ArgumentParser(
+        prog='benchmark',
+        description="Mide cada etapa del normalizador sobre archivos sintéticos."
+    )
+    parser.add_argument('--filas', type=int, default=FILAS, help="filas de cada archivo sintético")
+    parser.add_argument('--formatos', nargs='+', choices=['csv', 'xlsx'], default=['csv', 'xlsx'])
+    parser.add_argument('--encodings', nargs='+', choices=['latin-1', 'cp1252'], default=['latin-1', 'cp1252'],
+                        help="encodings de los CSV sintéticos")
+    parser.add_argument('--variantes', nargs='+', choices=sorted(variantes.VARIANTES),
+                        default=sorted(variantes.VARIANTES))
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES,
+                        help="corridas por archivo y variante; se informa la mediana")
+    parser.add_argument('--lector', choices=motor.LECTORES, default=motor.LECTOR, help="lector CSV a medir")
+    parser.add_argument('--semilla', type=int, default=SEMILLA)
+    parser.add_argument('--carpeta', default='benchmark_datos',
+                        help="carpeta de los archivos sintéticos (se reutilizan entre corridas)")
+    parser.add_argument('--guardar-base', metavar='JSON', help="guarda los resultados como línea base")
+    parser.add_argument('--comparar', metavar='JSON', help="compara contra una línea base guardada")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help="pérdida de filas/segundo aceptada antes de marcar regresión (0.10 = 10%%)")
+    return parser
+
+def main(argv=None):
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+    if args.filas < 1 or args.repeticiones < 1:
+        parser.error("--filas y --repeticiones deben ser al menos 1")
+
+    archivos = preparar_archivos(args.carpeta, args.filas, args.formatos, args.encodings, args.semilla)
+
+    print(encabezado_informe())
+    resultados = {}
+    for nombre_archivo, ruta in archivos.items():
+        for nombre_variante in args.variantes:
+            clave = f"{nombre_archivo} / {nombre_variante}"
+            resultados[clave] = medir(ruta, nombre_variante, args.repeticiones, args.lector)
+            print(formatear(clave, resultados[clave]), flush=True)
+
+    if args.guardar_base:
+        opciones = {'filas': args.filas, 'semilla': args.semilla, 'repeticiones': args.repeticiones,
+                    'lector': args.lector}
+        guardar_base(args.guardar_base, resultados, opciones)
+        print(f"\nLínea base guardada en {args.guardar_base}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as file:
+            base = json.load(file)
+        if base['opciones'].get('filas') != args.filas:
+            print(f"\nAviso: la línea base usó {base['opciones'].get('filas')} filas y esta corrida {args.filas}")
+        lineas, regresiones = comparar(resultados, base, args.tolerancia)
+        print(f"\nComparación con {args.comparar} (tolerancia {args.tolerancia:.0%}):")
+        print('\n'.join(lineas))
+        if regresiones:
+            print(f"\n{regresiones} regresiones")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
+
+#...................................................... | END
@@ -0,0 +1,293 @@
+"""
+DETECCIÓN DE FORMATO DE ARCHIVOS
+Desarrollado por Felipe Alexander Correa Rodríguez
+
+Detecta el encoding de un archivo leyendo sólo muestras acotadas (inicio,
+medio y final) en lugar del archivo completo:
+1. BOM al inicio del archivo.
+2. Validación rápida de UTF-8 sobre las muestras. Si las muestras son sólo
+   ASCII se valida además el archivo completo (una pasada que salta los
+   bloques ASCII), porque un único carácter latin-1 entre las muestras
+   haría fallar la lectura como UTF-8. Es el único caso que lee más allá
+   del presupuesto, y el motivo devuelto lo dice.
+3. chardet.UniversalDetector alimentado bloque a bloque hasta que tiene
+   confianza suficiente o se agota el presupuesto de bytes.
+
+El dialecto CSV (delimitador y comillas) se detecta con líneas
+de esas mismas muestras: cada delimitador candidato se puntúa según qué tan
+constante es la cantidad de columnas de línea a línea, y se entrega con una
+confianza y los demás candidatos ordenados.
+"""
+
+#...................................................... | STACK DE LIBRERÍAS
+import codecs
+import csv
+import re
+from collections import Counter
+from chardet import UniversalDetector
+from entrada import ArchivoMapeado
+
+#...................................................... | CONFIGURACIÓN
+PRESUPUESTO_BYTES = 1 << 20   # ..máximo de bytes leídos para detectar el encoding
+BLOQUE_VALIDACION = 1 << 20   # ..bytes por paso al validar UTF-8 el archivo completo
+TAMANO_MUESTRA = 64 << 10     # ..tamaño de cada bloque de muestra
+ENCODING_RESPALDO = 'latin-1'  # ..cuando chardet no decide; nunca falla al leer
+CONFIANZA_ENCODING = 0.5       # ..bajo esta confianza de chardet se usa el respaldo
+
+# ..utf-32 antes que utf-16: el BOM de utf-32 LE empieza con el de utf-16 LE
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# ..dialecto: candidatos en orden de preferencia ante un empate
+DELIMITADORES = [',', ';', '|', '\t']
+COMILLAS = ['"', "'"]
+PRESUPUESTO_DIALECTO = 256 << 10  # ..bytes leídos para detectar el dialecto
+MUESTRA_DIALECTO = 16 << 10
+LINEAS_POR_MUESTRA = 100
+CONFIANZA_DIALECTO = 0.8  # ..bajo este valor se informan los otros candidatos
+
+#...................................................... | MUESTREO
+def posiciones_muestra(tamano_archivo, presupuesto=PRESUPUESTO_BYTES, tamano_muestra=TAMANO_MUESTRA):
+    """
+    Posiciones de los bloques a leer: inicio, final y medio primero, luego
+    posiciones repartidas en el archivo hasta completar el presupuesto.
+    """
+    cantidad = max(presupuesto // tamano_muestra, 3)
+    ultimo = tamano_archivo - tamano_muestra
+    repartidas = [round(ultimo * i / (cantidad - 1)) for i in range(cantidad)]
+    primeras = [0, ultimo, repartidas[len(repartidas) // 2]]
+    return primeras + [posicion for posicion in repartidas if posicion not in primeras]
+
+def leer_muestras(archivo, presupuesto=PRESUPUESTO_BYTES, tamano_muestra=TAMANO_MUESTRA):
+    """
+    Lee los bloques de muestra. Un archivo dentro del presupuesto se lee
+    completo; si no, cada bloque salvo el primero se alinea al inicio de la
+    línea siguiente para no partir caracteres multibyte.
+    archivo puede ser una ruta o un entrada.ArchivoMapeado, del que se toman
+    los rangos sin volver a abrir el archivo.
+    """
+    if not isinstance(archivo, ArchivoMapeado):
+        with ArchivoMapeado(archivo) as mapeado:
+            yield from leer_muestras(mapeado, presupuesto, tamano_muestra)
+        return
+
+    if archivo.tamano <= presupuesto:
+        yield archivo.rango(0, archivo.tamano)
+        return
+    for posicion in posiciones_muestra(archivo.tamano, presupuesto, tamano_muestra):
+        bloque = archivo.rango(posicion, posicion + tamano_muestra)
+        if posicion > 0:
+            salto = bloque.find(b'\n')
+            bloque = bloque[salto + 1:] if salto >= 0 else b''
+        yield bloque
+
+def es_utf8_valido(bloque):
+    """Verifica que el bloque sea UTF-8 (tolera un carácter cortado al final)"""
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(bloque, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+#...................................................... | DETECCIÓN DE ENCODING
+def detectar_encoding(archivo, presupuesto=PRESUPUESTO_BYTES, tamano_muestra=TAMANO_MUESTRA):
+    """
+    Detecta el encoding de una ruta o de un entrada.ArchivoMapeado. Las
+    muestras y chardet leen como máximo `presupuesto` bytes, salvo cuando
+    todas las muestras son sólo ASCII en un archivo más grande que el
+    presupuesto: entonces se valida todo el archivo como UTF-8, hasta el
+    primer byte inválido (ver primer_byte_no_utf8), y el motivo lo indica. Devuelve (encoding, motivo)
+    donde motivo explica cómo se decidió.
+    """
+    if not isinstance(archivo, ArchivoMapeado):
+        with ArchivoMapeado(archivo) as mapeado:
+            return detectar_encoding(mapeado, presupuesto, tamano_muestra)
+
+    muestras = list(leer_muestras(archivo, presupuesto, tamano_muestra))
+
+    # ..BOM
+    for bom, encoding in BOMS:
+        if muestras[0].startswith(bom):
+            return encoding, f"BOM de {encoding} al inicio del archivo"
+
+    # ..UTF-8 válido en todas las muestras
+    recorrido = ''
+    if all(es_utf8_valido(bloque) for bloque in muestras):
+        if not all(bloque.isascii() for bloque in muestras):
+            return 'utf-8', "muestras con caracteres UTF-8 válidos"
+        if archivo.tamano <= presupuesto:
+            return 'utf-8', "archivo sólo ASCII, se lee como UTF-8"
+        # ..sólo ASCII en las muestras no asegura el resto del archivo: se recorre completo
+        error = primer_byte_no_utf8(archivo)
+        if error is None:
+            return 'utf-8', f"muestras sólo ASCII y archivo completo ({archivo.tamano} bytes) UTF-8 válido"
+        recorrido = f" (y la validación UTF-8 recorrió el archivo hasta el byte {error} de {archivo.tamano})"
+        muestras.append(archivo.rango(error - tamano_muestra // 2, error + tamano_muestra // 2))
+
+    # ..chardet puede darse por satisfecho con bloques ASCII: primero los que tienen bytes altos
+    muestras.sort(key=bytes.isascii)
+
+    # ..chardet incremental, se detiene cuando tiene confianza
+    detector = UniversalDetector()
+    leidos = 0
+    for bloque in muestras:
+        detector.feed(bloque)
+        leidos += len(bloque)
+        if detector.done:
+            break
+    detector.close()
+
+    encoding = detector.result.get('encoding')
+    confianza = detector.result.get('confidence') or 0.0
+    # ..aquí ya se sabe que el archivo no es UTF-8 (ni ASCII)
+    if encoding and codecs.lookup(encoding).name in ('ascii', 'utf-8'):
+        encoding = None
+    if not encoding or confianza < CONFIANZA_ENCODING:
+        return ENCODING_RESPALDO, f"chardet no decidió tras {leidos} bytes{recorrido}, se usa {ENCODING_RESPALDO}"
+    return encoding, f"chardet con confianza {confianza:.0%} tras {leidos} bytes{recorrido}"
+
+def detectar_encoding_utf8(archivo, respaldo=ENCODING_RESPALDO):
+    """
+    Decide entre UTF-8 y `respaldo` en una sola pasada por el archivo (ruta
+    o entrada.ArchivoMapeado): BOM al inicio, o UTF-8 válido de principio a
+    fin, deteniéndose en el primer byte inválido. Es el mismo resultado que
+    intentar leer con 'utf-8' y, si falla, con respaldo, sin leer el archivo
+    dos veces. Devuelve (encoding, motivo).
+    """
+    if not isinstance(archivo, ArchivoMapeado):
+        with ArchivoMapeado(archivo) as mapeado:
+            return detectar_encoding_utf8(mapeado, respaldo)
+
+    inicio = archivo.rango(0, 4)
+    for bom, encoding in BOMS:
+        if inicio.startswith(bom):
+            return encoding, f"BOM de {encoding} al inicio del archivo"
+
+    error = primer_byte_no_utf8(archivo)
+    if error is None:
+        return 'utf-8', f"UTF-8 válido en los {archivo.tamano} bytes del archivo"
+    if error >= archivo.tamano:
+        return respaldo, f"el archivo termina con un carácter UTF-8 incompleto, se usa {respaldo}"
+    return respaldo, f"byte no UTF-8 en la posición {error} de {archivo.tamano}, se usa {respaldo}"
+
+def primer_byte_no_utf8(archivo):
+    """
+    Recorre un entrada.ArchivoMapeado completo y devuelve la posición del
+    primer byte que no es UTF-8 válido (el tamaño del archivo si termina con
+    un carácter incompleto), o None si todo el archivo es UTF-8 válido.
+    """
+    decodificador = codecs.getincrementaldecoder('utf-8')()
+    for posicion in range(0, archivo.tamano, BLOQUE_VALIDACION):
+        bloque = archivo.rango(posicion, posicion + BLOQUE_VALIDACION)
+        # ..un bloque ASCII es UTF-8 válido salvo que quede un carácter cortado del anterior
+        pendiente = decodificador.getstate()[0]
+        if bloque.isascii() and not pendiente:
+            continue
+        try:
+            decodificador.decode(bloque)
+        except UnicodeDecodeError as e:
+            return posicion - len(pendiente) + e.start
+    try:
+        decodificador.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return archivo.tamano
+    return None
+
+#...................................................... | DETECCIÓN DE DIALECTO
+class Dialecto:
+    """Dialecto detectado de un CSV y qué tan seguro es (confianza de 0 a 1)"""
+
+    def __init__(self, delimitador, comillas, confianza, candidatos):
+        self.delimitador = delimitador
+        self.comillas = comillas
+        self.confianza = confianza
+        # ..[(delimitador, puntaje)] de mejor a peor, para probar otro si la lectura falla
+        self.candidatos = candidatos
+
+    def descripcion(self):
+        return (
+            f"delimitador {self.delimitador!r}, comillas {self.comillas!r}, confianza {self.confianza:.0%}"
+        )
+
+def lineas_muestra(archivo, encoding, presupuesto=PRESUPUESTO_DIALECTO, tamano_muestra=MUESTRA_DIALECTO):
+    """
+    Líneas completas de las muestras del archivo (inicio, final y medio
+    primero), como una lista por muestra. La primera línea de la primera
+    muestra es la del encabezado.
+    """
+    bloques = leer_muestras(archivo, presupuesto, tamano_muestra)
+    # ..en UTF-16/32 un salto de línea no marca el inicio de un carácter; se usa sólo el inicio
+    if codecs.lookup(encoding).name.startswith(('utf-16', 'utf-32')):
+        bloques = [next(bloques)[:tamano_muestra]]
+    textos = [bloque.decode(encoding, errors='replace') for bloque in bloques]
+
+    muestras = []
+    for texto in textos:
+        lineas = texto.splitlines()
+        # ..la última línea puede estar cortada por el tamaño de la muestra
+        if len(lineas) > 1 and not texto.endswith(('\n', '\r')):
+            lineas.pop()
+        muestras.append(lineas[:LINEAS_POR_MUESTRA])
+    return muestras
+
+def detectar_comillas(muestras, delimitadores=DELIMITADORES):
+    """Carácter de comillas más frecuente al inicio de un campo; '"' si no aparece ninguno"""
+    separadores = re.escape(''.join(delimitadores))
+    texto = '\n'.join(linea for lineas in muestras for linea in lineas)
+    conteos = {
+        comillas: len(re.findall(f"(?:^|[{separadores}])\\s*{comillas}", texto, re.MULTILINE))
+        for comillas in COMILLAS
+    }
+    return max(COMILLAS, key=lambda comillas: conteos[comillas]) if any(conteos.values()) else COMILLAS[0]
+
+def puntaje_delimitador(muestras, delimitador, comillas):
+    """
+    Proporción de filas con la cantidad de columnas más frecuente y esa
+    cantidad de columnas. Es 0 si esa cantidad es 1 o si la primera fila
+    (el encabezado) tiene otra cantidad, porque el lector no podría usarlo.
+    """
+    conteos = [
+        len(fila)
+        for lineas in muestras
+        for fila in csv.reader(lineas, delimiter=delimitador, quotechar=comillas)
+        if fila
+    ]
+    if not conteos:
+        return 0.0, 1
+    columnas, frecuencia = Counter(conteos).most_common(1)[0]
+    if columnas < 2 or conteos[0] != columnas:
+        return 0.0, columnas
+    return frecuencia / len(conteos), columnas
+
+def detectar_dialecto(archivo, encoding, presupuesto=PRESUPUESTO_DIALECTO, tamano_muestra=MUESTRA_DIALECTO):
+    """
+    Detecta delimitador y comillas con líneas tomadas de varias partes del
+    archivo. La confianza es el puntaje del delimitador elegido, rebajado si
+    el segundo candidato también parte las líneas de forma constante. Si ningún candidato da más de una columna se devuelve ','
+    con confianza 0.
+    """
+    muestras = [lineas for lineas in lineas_muestra(archivo, encoding, presupuesto, tamano_muestra) if lineas]
+    comillas = detectar_comillas(muestras)
+
+    puntajes = {delimitador: puntaje_delimitador(muestras, delimitador, comillas) for delimitador in DELIMITADORES}
+    # ..a igual constancia gana el que separa más columnas y luego el orden de DELIMITADORES
+    candidatos = sorted(DELIMITADORES, key=lambda delimitador: puntajes[delimitador], reverse=True)
+    delimitador, segundo = candidatos[0], candidatos[1]
+    puntaje = puntajes[delimitador][0]
+    confianza = puntaje * (1 - puntajes[segundo][0] / 2)
+    if not puntaje:
+        delimitador = DELIMITADORES[0]
+
+    return Dialecto(
+        delimitador,
+        comillas,
+        confianza,
+        [(candidato, puntajes[candidato][0]) for candidato in candidatos]
+    )
+
+#...................................................... | END
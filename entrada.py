@@ -0,0 +1,126 @@
+"""
+CAPA DE ENTRADA COMPARTIDA
+Desarrollado por Felipe Alexander Correa Rodríguez
+
+Mapea en memoria (mmap) el archivo de entrada una sola vez. Del mismo mapeo
+salen los rangos de bytes para detectar el encoding y el dialecto, la vista
+previa y los datos que lee el parser: pandas lo recorre como un flujo
+binario y pyarrow lo recibe como un buffer Arrow sin copiarlo. El archivo
+se lee del disco (o de la carpeta de red) una sola vez; las lecturas
+siguientes salen de la caché de páginas del sistema.
+
+ArchivoMapeado se comporta como una ruta (os.PathLike), así que se puede
+pasar donde se espera el nombre del archivo.
+"""
+
+#...................................................... | STACK DE LIBRERÍAS
+import io
+import mmap
+import os
+from pathlib import Path
+
+#...................................................... | FLUJO SOBRE EL MAPEO
+class FlujoMapeado(io.RawIOBase):
+    """Lectura secuencial sobre el mapeo, con posición propia (no la del mmap)"""
+
+    def __init__(self, vista):
+        self.vista = vista
+        self.posicion = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, destino):
+        cantidad = max(min(len(destino), len(self.vista) - self.posicion), 0)
+        destino[:cantidad] = self.vista[self.posicion:self.posicion + cantidad]
+        self.posicion += cantidad
+        return cantidad
+
+    def seek(self, desplazamiento, desde=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.posicion, io.SEEK_END: len(self.vista)}[desde]
+        self.posicion = max(base + desplazamiento, 0)
+        return self.posicion
+
+    def tell(self):
+        return self.posicion
+
+    def close(self):
+        if not self.closed:
+            self.vista.release()
+        super().close()
+
+#...................................................... | ARCHIVO MAPEADO
+class ArchivoMapeado:
+    """
+    Archivo de entrada mapeado en memoria de sólo lectura. Un archivo vacío
+    no se puede mapear y se representa con un buffer vacío.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        estado = os.stat(self.ruta)
+        self.tamano = estado.st_size
+        self.modificado = estado.st_mtime_ns
+        if self.tamano:
+            # ..el mmap conserva su propio descriptor; el archivo se puede cerrar
+            with open(self.ruta, 'rb') as archivo:
+                self.mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.mapa = b''
+
+    def __fspath__(self):
+        return str(self.ruta)
+
+    def __str__(self):
+        return str(self.ruta)
+
+    @property
+    def name(self):
+        return self.ruta.name
+
+    def vigente(self, ruta):
+        """El mapeo corresponde a ruta y el archivo no cambió desde que se mapeó"""
+        try:
+            estado = os.stat(ruta)
+        except OSError:
+            return False
+        return (Path(ruta) == self.ruta and estado.st_size == self.tamano
+                and estado.st_mtime_ns == self.modificado)
+
+    def rango(self, inicio, fin):
+        """Bytes de [inicio, fin), recortados al tamaño del archivo"""
+        return self.mapa[max(inicio, 0):min(fin, self.tamano)]
+
+    def flujo(self):
+        """Flujo binario independiente desde el inicio, para pd.read_csv"""
+        return FlujoMapeado(memoryview(self.mapa))
+
+    def buffer_arrow(self):
+        """El mapeo como pyarrow.BufferReader, sin copiar los bytes"""
+        import pyarrow as pa
+        return pa.BufferReader(pa.py_buffer(self.mapa))
+
+    def cerrar(self):
+        if isinstance(self.mapa, mmap.mmap):
+            try:
+                self.mapa.close()
+            except BufferError:
+                # ..todavía hay vistas abiertas (ej: un lector en otro hilo); se libera al soltarlas
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+def abrir_binario(archivo):
+    """Flujo binario de una ruta o de un ArchivoMapeado (sin volver a abrir el archivo)"""
+    if isinstance(archivo, ArchivoMapeado):
+        return archivo.flujo()
+    return open(archivo, 'rb')
+
+#...................................................... | END
@@ -0,0 +1,235 @@
+"""
+NORMALIZACIÓN INCREMENTAL
+Desarrollado por Felipe Alexander Correa Rodríguez
+
+Para exportes que se vuelven a normalizar cada mes y cambian en pocas filas.
+Junto a la salida CSV se guarda un manifiesto (<salida>.manifiesto.npz) con
+el hash de cada fila de entrada, en el orden de las filas de la salida, la
+clasificación de columnas usada y la huella de las reglas de la variante.
+
+En la corrida siguiente sólo se normalizan las filas cuyo hash no está en el
+manifiesto (nuevas o modificadas); las demás se toman ya normalizadas de la
+salida anterior. Con delta=True se escribe además <nombre>_delta.csv sólo
+con las filas nuevas o modificadas, para cargarlas con un upsert.
+
+Si no hay manifiesto, o no corresponde a la salida actual, a la variante, a
+las reglas vigentes o a las columnas de la entrada, se normaliza todo.
+"""
+
+#...................................................... | STACK DE LIBRERÍAS
+import json
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import instrumentacion
+import motor
+
+#...................................................... | CONFIGURACIÓN
+VERSION_MANIFIESTO = 1
+SUFIJO_MANIFIESTO = '.manifiesto.npz'
+SUFIJO_DELTA = '_delta'
+
+#...................................................... | UTILIDADES
+def ruta_manifiesto(archivo_salida):
+    salida = Path(archivo_salida)
+    return salida.with_name(salida.name + SUFIJO_MANIFIESTO)
+
+def ruta_delta(archivo_salida):
+    salida = Path(archivo_salida)
+    return salida.with_name(f"{salida.stem}{SUFIJO_DELTA}{salida.suffix}")
+
+def hashes_filas(df):
+    """Hash de 64 bits del contenido de cada fila (sin el índice)"""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+def estado_archivo(ruta):
+    """(tamaño, fecha de modificación) para saber si la salida cambió desde la última corrida"""
+    estado = os.stat(ruta)
+    return [estado.st_size, estado.st_mtime_ns]
+
+def leer_salida_csv(archivo_salida, opciones_escritura=None):
+    """Lee la salida anterior como texto, tal como se escribió (las celdas vacías quedan "")"""
+    separador = (opciones_escritura or {}).get('sep', ',')
+    return pd.read_csv(archivo_salida, sep=separador, encoding='utf-8', dtype=str, keep_default_na=False)
+
+#...................................................... | MANIFIESTO
+class Manifiesto:
+    """Hashes de las filas de la salida y lo necesario para saber si se pueden reutilizar"""
+
+    def __init__(self, hashes, columnas, clases, variante, huella, salida):
+        self.hashes = hashes
+        self.columnas = columnas
+        self.clases = clases
+        self.variante = variante
+        self.huella = huella
+        # ..[tamaño, modificación] de la salida escrita junto con este manifiesto
+        self.salida = salida
+
+    def guardar(self, ruta):
+        datos = {
+            'version': VERSION_MANIFIESTO,
+            'columnas': self.columnas,
+            'clases': self.clases,
+            'variante': self.variante,
+            'huella': self.huella,
+            'salida': self.salida,
+        }
+        # ..se escribe con otro nombre y se reemplaza, para no dejar un manifiesto a medias
+        temporal = ruta.with_name(ruta.name + '.tmp')
+        with open(temporal, 'wb') as archivo:
+            np.savez(archivo, hashes=self.hashes, datos=np.array(json.dumps(datos)))
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Manifiesto guardado en ruta, o None si no existe o no se puede leer"""
+        try:
+            with np.load(ruta) as contenido:
+                hashes = contenido['hashes']
+                datos = json.loads(str(contenido['datos']))
+        except (OSError, ValueError, KeyError):
+            return None
+        if datos.get('version') != VERSION_MANIFIESTO:
+            return None
+        return cls(hashes, datos['columnas'], datos['clases'], datos['variante'], datos['huella'], datos['salida'])
+
+    def incompatibilidad(self, variante, columnas, archivo_salida):
+        """Motivo por el que no se puede reutilizar la salida anterior, o None"""
+        if self.variante != variante.nombre:
+            return f"la salida anterior es de la variante {self.variante}"
+        if self.huella != variante.huella():
+            return "cambiaron las reglas de normalización"
+        if self.columnas != columnas:
+            return "cambiaron las columnas de la entrada"
+        if not os.path.exists(archivo_salida):
+            return "no existe la salida anterior"
+        if estado_archivo(archivo_salida) != self.salida:
+            return "la salida anterior fue modificada"
+        return None
+
+#...................................................... | RESULTADO
+class ResultadoIncremental:
+    """Filas escritas y cuántas se normalizaron, se reutilizaron o ya no están"""
+
+    def __init__(self, filas, nuevas, eliminadas=0, motivo=None, delta=None):
+        self.filas = filas
+        self.nuevas = nuevas
+        self.reutilizadas = filas - nuevas
+        self.eliminadas = eliminadas
+        # ..por qué se normalizó todo (None si se reutilizó la salida anterior)
+        self.motivo = motivo
+        self.delta = delta
+
+    def descripcion(self):
+        if self.motivo:
+            texto = f"{self.filas} filas normalizadas completas ({self.motivo})"
+        else:
+            texto = (
+                f"{self.nuevas} filas nuevas o modificadas normalizadas, {self.reutilizadas} reutilizadas, "
+                f"{self.eliminadas} ya no están en la entrada"
+            )
+        if self.delta:
+            texto += f"; delta en {self.delta}"
+        return texto
+
+#...................................................... | PROCESO
+def normalizar_incremental(archivo_entrada, archivo_salida, variante, encoding=None, delimitador=None,
+                           ejecutor=None, trabajadores=1, cache=None, al_avanzar=None, cancelar=None,
+                           lector=motor.LECTOR, comillas=motor.COMILLAS, delta=False):
+    """
+    Como motor.normalizar_archivo en memoria, pero reutilizando las filas ya
+    normalizadas de la salida anterior según el manifiesto (ver arriba). La
+    salida debe ser CSV. Con delta escribe también ruta_delta(archivo_salida).
+    Devuelve un ResultadoIncremental.
+    """
+    def informar(fraccion, mensaje):
+        if al_avanzar:
+            al_avanzar(fraccion, mensaje)
+
+    if not motor.es_csv(archivo_salida):
+        raise ValueError("El modo incremental requiere salida CSV")
+
+    contexto = dict(archivo=Path(str(archivo_entrada)).name, variante=variante.nombre, modo='incremental')
+    with instrumentacion.etapa('lectura', bytes_leidos=os.path.getsize(archivo_entrada), **contexto) as medicion:
+        if motor.es_csv(archivo_entrada):
+            df = motor.leer_csv(archivo_entrada, encoding, delimitador, lector=lector, comillas=comillas,
+                                **variante.opciones_lectura)
+        else:
+            df = motor.leer_excel(archivo_entrada)
+        medicion['filas'] = len(df)
+    # ..los hashes son del contenido original; así una fila igual a la del mes anterior se reconoce
+    hashes = hashes_filas(df)
+    columnas = [str(columna) for columna in df.columns]
+    informar(0.2, f"Archivo leído ({len(df)} filas, {len(df.columns)} columnas)")
+    motor.revisar_cancelacion(cancelar)
+
+    df = variante.normalizar_encabezados(df)
+    df.index = pd.RangeIndex(len(df))
+
+    manifiesto = Manifiesto.cargar(ruta_manifiesto(archivo_salida))
+    motivo = "sin manifiesto" if manifiesto is None else manifiesto.incompatibilidad(
+        variante, columnas, archivo_salida
+    )
+    anterior = None
+    if motivo is None:
+        anterior = leer_salida_csv(archivo_salida, variante.opciones_escritura)
+        normalizar_datos = variante.preparar(df, manifiesto.clases)
+        if len(anterior) != len(manifiesto.hashes):
+            motivo = "la salida anterior no calza con el manifiesto"
+        elif list(anterior.columns) != list(motor.columnas_resultado(df, normalizar_datos)):
+            motivo = "cambiaron las columnas de la salida"
+    if motivo is not None:
+        anterior = None
+        clases = variante.clasificar(df)
+        normalizar_datos = variante.preparar(df, clases)
+    else:
+        clases = manifiesto.clases
+
+    # ..posición en la salida anterior de cada fila (-1 = nueva o modificada)
+    if anterior is None:
+        posiciones = np.full(len(df), -1)
+        eliminadas = 0
+    else:
+        previas = pd.Series(np.arange(len(manifiesto.hashes)), index=manifiesto.hashes)
+        previas = previas[~previas.index.duplicated()]
+        posiciones = previas.reindex(hashes).fillna(-1).to_numpy(dtype=np.int64)
+        eliminadas = int(np.isin(manifiesto.hashes, hashes, invert=True).sum())
+    nuevas = posiciones < 0
+
+    def al_columna(numero, total):
+        informar(0.2 + 0.7 * numero / total, f"Columna {numero}/{total} normalizada")
+
+    pendientes = df[nuevas]
+    with instrumentacion.etapa('datos', filas=len(pendientes), **contexto):
+        if ejecutor:
+            normalizadas = motor.normalizar_en_paralelo(pendientes, normalizar_datos, ejecutor, trabajadores,
+                                                        al_columna, cancelar)
+        else:
+            normalizadas = motor.normalizar_por_columnas(pendientes, normalizar_datos, cache=cache,
+                                                         al_columna=al_columna, cancelar=cancelar)
+
+    if anterior is None:
+        resultado = normalizadas
+    else:
+        reutilizadas = anterior.iloc[posiciones[~nuevas]]
+        reutilizadas.index = df.index[~nuevas]
+        resultado = pd.concat([reutilizadas, normalizadas]).sort_index()
+    motor.revisar_cancelacion(cancelar)
+
+    with instrumentacion.etapa('escritura', filas=len(resultado), **contexto) as medicion:
+        motor.escribir_archivo(resultado, archivo_salida, variante.opciones_escritura)
+        medicion['bytes_escritos'] = os.path.getsize(archivo_salida)
+    destino_delta = None
+    if delta:
+        destino_delta = ruta_delta(archivo_salida)
+        with instrumentacion.etapa('escritura_delta', filas=len(normalizadas), **contexto) as medicion:
+            motor.escribir_archivo(normalizadas, destino_delta, variante.opciones_escritura)
+            medicion['bytes_escritos'] = os.path.getsize(destino_delta)
+    Manifiesto(hashes, columnas, clases, variante.nombre, variante.huella(),
+               estado_archivo(archivo_salida)).guardar(ruta_manifiesto(archivo_salida))
+    informar(1.0, f"Archivo guardado ({len(resultado)} filas)")
+
+    return ResultadoIncremental(len(resultado), int(nuevas.sum()), eliminadas, motivo, destino_delta)
+
+#...................................................... | END
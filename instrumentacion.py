@@ -0,0 +1,209 @@
+"""
+INSTRUMENTACIÓN DE ETAPAS
+Desarrollado por Felipe Alexander Correa Rodríguez
+
+Mide cada etapa de la normalización (detección de encoding y dialecto,
+lectura, encabezados, cada columna según su clase, escritura y, en modo por
+bloques, cada bloque) y la registra como una línea JSON en el log:
+
+    {"momento": "...", "etapa": "columna", "archivo": "remu.csv", "columna": "NOMBRE",
+     "clase": "texto", "segundos": 0.41, "cpu": 0.4, "filas": 250000,
+     "memoria_pico_proceso_mb": 512.3, "memoria_pico_etapa_mb": 120.0}
+
+Los campos son: segundos (reloj), cpu (tiempo de CPU del proceso), filas,
+bytes_leidos / bytes_escritos cuando corresponde, el pico de memoria
+residente del proceso hasta el final de la etapa (memoria_pico_proceso_mb,
+que incluye lo que usaron las etapas anteriores) y cuánto subió ese pico
+durante la etapa (memoria_pico_etapa_mb, 0 si la etapa no superó el pico
+que ya había). Las etapas se anidan: los datos de una etapa (ej: el
+archivo) pasan a las etapas que corren dentro de ella.
+
+Con configurar(memoria=True) se activa tracemalloc y cada etapa informa
+también el pico de memoria Python propio (memoria_python_pico_mb); al
+terminar se registran los lugares del código que más memoria reservaron.
+perfilar() corre un bloque bajo cProfile, guarda las estadísticas para
+pstats/snakeviz y registra las funciones con más tiempo acumulado.
+
+Sin configurar() las etapas se miden igual (es barato) pero no se escriben.
+En procesos trabajadores sólo se registra si el proceso heredó el log.
+"""
+
+#...................................................... | STACK DE LIBRERÍAS
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+#...................................................... | CONFIGURACIÓN
+ARCHIVO_LOG = 'normalizador.log'
+LINEAS_PERFIL = 25  # ..funciones que se registran al perfilar con cProfile
+LINEAS_MEMORIA = 10  # ..lugares del código que se registran con tracemalloc
+MB = 1 << 20
+
+logger = logging.getLogger('normalizador.etapas')
+# ..las líneas JSON no pasan al log general (consola o texto con fecha y nivel)
+logger.propagate = False
+
+# ..etapa en curso en este hilo, para anidar datos y picos de memoria
+etapa_actual = contextvars.ContextVar('etapa_actual', default=None)
+# ..dentro de sin_registro() las etapas no se escriben
+silenciado = contextvars.ContextVar('silenciado', default=False)
+
+#...................................................... | MEMORIA
+def memoria_pico_mb():
+    """
+    Pico de memoria residente del proceso actual en MB desde que empezó, no
+    sólo de la etapa en curso (None si no se puede medir).
+    """
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ..Linux informa KB y macOS bytes
+        return pico / MB if sys.platform == 'darwin' else pico / 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memoria = psutil.Process().memory_info()
+    return getattr(memoria, 'peak_wset', memoria.rss) / MB
+
+#...................................................... | CONFIGURACIÓN DEL REGISTRO
+def configurar(archivo_log=ARCHIVO_LOG, memoria=False):
+    """
+    Escribe las etapas como líneas JSON en archivo_log (se agregan al final).
+    Con memoria activa tracemalloc para medir la memoria Python de cada etapa.
+    """
+    ruta = os.path.abspath(archivo_log)
+    if not any(getattr(manejador, 'baseFilename', None) == ruta for manejador in logger.handlers):
+        manejador = logging.FileHandler(ruta, encoding='utf-8')
+        manejador.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(manejador)
+    logger.setLevel(logging.INFO)
+    if memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def activo():
+    return logger.isEnabledFor(logging.INFO) and bool(logger.handlers)
+
+def registrar(etapa, **datos):
+    """Escribe una línea JSON con la etapa y sus datos"""
+    if activo() and not silenciado.get():
+        linea = {'momento': datetime.now().isoformat(timespec='milliseconds'), 'etapa': etapa, **datos}
+        logger.info(json.dumps(linea, ensure_ascii=False, default=str))
+
+def terminar():
+    """Registra los lugares del código que más memoria reservaron y detiene tracemalloc"""
+    if not tracemalloc.is_tracing():
+        return
+    lugares = tracemalloc.take_snapshot().statistics('lineno')[:LINEAS_MEMORIA]
+    registrar('memoria', lugares=[
+        {'lugar': str(lugar.traceback), 'mb': round(lugar.size / MB, 3), 'reservas': lugar.count}
+        for lugar in lugares
+    ])
+    tracemalloc.stop()
+
+#...................................................... | ETAPAS
+class Medicion:
+    """Datos de una etapa en curso; filas, bytes y otros datos se pueden agregar al medir"""
+
+    def __init__(self, nombre, datos, padre):
+        self.nombre = nombre
+        self.datos = datos
+        self.padre = padre
+        # ..memoria Python al empezar y pico visto por esta etapa y sus etapas internas
+        self.inicio_python = 0
+        self.pico_python = 0
+
+    def __setitem__(self, clave, valor):
+        self.datos[clave] = valor
+
+def heredados(padre):
+    """Datos de contexto (archivo, hoja, etc.) que pasan de una etapa a sus etapas internas"""
+    if padre is None:
+        return {}
+    return {clave: valor for clave, valor in padre.datos.items()
+            if clave not in ('filas', 'bytes_leidos', 'bytes_escritos')}
+
+@contextmanager
+def etapa(nombre, **datos):
+    """
+    Mide el bloque como la etapa nombre. Entrega una Medicion para agregar
+    datos conocidos al final (ej: medicion['filas'] = len(df)).
+    """
+    padre = etapa_actual.get()
+    medicion = Medicion(nombre, {**heredados(padre), **datos}, padre)
+    if tracemalloc.is_tracing():
+        medicion.inicio_python, pico = tracemalloc.get_traced_memory()
+        if padre is not None:
+            padre.pico_python = max(padre.pico_python, pico)
+        tracemalloc.reset_peak()
+    pico_inicio = memoria_pico_mb()
+    token = etapa_actual.set(medicion)
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield medicion
+    finally:
+        segundos, cpu = time.perf_counter() - inicio, time.process_time() - inicio_cpu
+        etapa_actual.reset(token)
+        resultado = {**medicion.datos, 'segundos': round(segundos, 4), 'cpu': round(cpu, 4)}
+        pico = memoria_pico_mb()
+        if pico is not None:
+            resultado['memoria_pico_proceso_mb'] = round(pico, 1)
+            resultado['memoria_pico_etapa_mb'] = round(pico - pico_inicio, 1)
+        if tracemalloc.is_tracing():
+            medicion.pico_python = max(medicion.pico_python, tracemalloc.get_traced_memory()[1])
+            resultado['memoria_python_pico_mb'] = round(medicion.pico_python / MB, 3)
+            # ..lo que la etapa reservó por sobre lo que ya estaba en uso al empezar
+            resultado['memoria_python_etapa_mb'] = round((medicion.pico_python - medicion.inicio_python) / MB, 3)
+            if padre is not None:
+                padre.pico_python = max(padre.pico_python, medicion.pico_python)
+            tracemalloc.reset_peak()
+        registrar(nombre, **resultado)
+
+def iniciar_trabajador():
+    """
+    Inicializador de los procesos del pool: un proceso creado con fork hereda
+    la etapa que estaba en curso al crearlo; sus etapas se marcan en cambio
+    con el número de proceso.
+    """
+    etapa_actual.set(Medicion('trabajador', {'proceso': os.getpid()}, None))
+
+@contextmanager
+def sin_registro():
+    """Las etapas del bloque se miden pero no se escriben (ej: pruebas con 0 filas)"""
+    token = silenciado.set(True)
+    try:
+        yield
+    finally:
+        silenciado.reset(token)
+
+#...................................................... | PERFIL CON CPROFILE
+@contextmanager
+def perfilar(ruta_perfil, lineas=LINEAS_PERFIL):
+    """
+    Corre el bloque bajo cProfile, guarda las estadísticas en ruta_perfil
+    (para pstats o snakeviz) y registra las funciones con más tiempo acumulado.
+    """
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield perfil
+    finally:
+        perfil.disable()
+        perfil.dump_stats(str(ruta_perfil))
+        texto = io.StringIO()
+        pstats.Stats(perfil, stream=texto).sort_stats('cumulative').print_stats(lineas)
+        registrar('perfil', archivo_perfil=str(ruta_perfil), funciones=texto.getvalue().strip().splitlines())
+
+#...................................................... | END
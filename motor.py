@@ -0,0 +1,908 @@
+"""
+MOTOR DE NORMALIZACIÓN POR BLOQUES
+Desarrollado por Felipe Alexander Correa Rodríguez
+
+Lee archivos CSV en bloques de filas (chunksize), aplica la normalización de
+cada variante bloque a bloque y va agregando el resultado al archivo de salida.
+La memoria usada queda acotada por el tamaño del bloque y no por el del archivo.
+
+Opcionalmente las columnas (o bloques de filas, si la tabla tiene menos
+columnas que procesos) se reparten entre varios procesos con
+ProcessPoolExecutor y se vuelven a unir en el orden original.
+
+Ambos caminos (en memoria y por bloques) leen las celdas como texto, así la
+inferencia de tipos de pandas no cambia de un bloque a otro y la salida es
+idéntica byte a byte.
+
+La entrada puede ser una ruta o un entrada.ArchivoMapeado ya usado para
+detectar encoding y dialecto: el parser lee del mismo mapeo (como flujo
+binario en pandas o como buffer Arrow en pyarrow) sin volver a abrir el
+archivo.
+
+En memoria se puede elegir el lector pyarrow (pyarrow.csv, que separa el
+archivo en bloques y los convierte en paralelo, con columnas string[pyarrow]).
+Cuando el archivo o las opciones no son compatibles con él (lectura por
+bloques, on_bad_lines='skip', filas con columnas de más o de menos,
+encabezados repetidos o vacíos) se usa el motor C de pandas.
+
+Los XLSX también se pueden procesar por bloques: la primera hoja se recorre
+fila a fila con openpyxl en modo read_only (o con python-calamine si está
+instalado) y la salida Excel se escribe con openpyxl en modo write_only, que
+vuelca las filas a disco sin armar el libro completo en memoria.
+
+La salida se elige por extensión: CSV, Excel o formatos columnares (Parquet y
+Arrow IPC / Feather, con pyarrow). Los columnares conservan los tipos que deja
+la normalización (montos y horas como float, el resto como texto) y en el modo
+por bloques cada bloque se agrega como un row group / record batch. En vez
+de un archivo, la salida puede ser una tabla de base de datos
+(base_datos.TablaDestino), que se carga por lotes a medida que se normaliza.
+"""
+
+#...................................................... | STACK DE LIBRERÍAS
+import logging
+import os
+import itertools
+import re
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+import numpy as np
+import pandas as pd
+from entrada import ArchivoMapeado, abrir_binario
+import base_datos
+import instrumentacion
+
+#...................................................... | CONFIGURACIÓN
+TAMANO_BLOQUE = 100_000
+TRABAJADORES = os.cpu_count() or 1
+
+# ..extensión -> formato columnar; Feather v2 es el formato de archivo Arrow IPC
+FORMATOS_COLUMNARES = {'.parquet': 'parquet', '.feather': 'ipc', '.arrow': 'ipc', '.ipc': 'ipc'}
+COMPRESIONES = {
+    'parquet': ['snappy', 'gzip', 'brotli', 'zstd', 'lz4', 'ninguna'],
+    'ipc': ['lz4', 'zstd', 'ninguna'],
+}
+
+# ..Excel que se leen y escriben fila a fila (openpyxl no abre .xls)
+EXTENSIONES_EXCEL = ('.xlsx', '.xlsm')
+MAXIMO_FILAS_EXCEL = 1_048_576
+HOJA_EXCEL = 'Sheet1'
+ERRORES_EXCEL = ('#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A')
+
+LECTORES = ['c', 'pyarrow']
+LECTOR = 'c'
+COMILLAS = '"'
+# ..textos que pandas lee como nulos por defecto (na_values), para que pyarrow haga lo mismo
+VALORES_NULOS = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+                 '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+logger = logging.getLogger(__name__)
+
+#...................................................... | LECTURA
+class LectorNoCompatible(Exception):
+    """El archivo o las opciones requieren el motor C de pandas"""
+
+def usa_pyarrow(lector, tamano_bloque=None, opciones=None):
+    """
+    El lector pyarrow se usa sólo en memoria, sin opciones propias del motor C
+    (on_bad_lines distinto de 'error', low_memory, etc.) y si pyarrow está instalado.
+    """
+    opciones = dict(opciones or {})
+    if lector != 'pyarrow' or tamano_bloque:
+        return False
+    if opciones.pop('on_bad_lines', 'error') != 'error' or opciones:
+        return False
+    try:
+        import pyarrow.csv
+    except ImportError:
+        return False
+    return True
+
+def leer_csv_pyarrow(archivo, encoding, delimitador, comillas=COMILLAS):
+    """
+    Lee un CSV completo con pyarrow.csv (bloques en paralelo), con todas las
+    columnas como texto y los mismos nulos que pandas. Lanza LectorNoCompatible
+    si el resultado no sería igual al del motor C.
+    """
+    import pyarrow as pa
+    import pyarrow.csv
+
+    def fuente():
+        # ..cada pasada necesita su propio lector; sobre el mapeo no se copian los bytes
+        return archivo.buffer_arrow() if isinstance(archivo, ArchivoMapeado) else archivo
+
+    opciones_lectura = pyarrow.csv.ReadOptions(encoding=encoding or 'utf-8', use_threads=True)
+    opciones_formato = pyarrow.csv.ParseOptions(delimiter=delimitador or ',', quote_char=comillas)
+    try:
+        # ..el primer bloque entrega los nombres de columna para fijarlas todas como texto
+        with pyarrow.csv.open_csv(fuente(), read_options=opciones_lectura, parse_options=opciones_formato) as lector:
+            nombres = lector.schema.names
+        if '' in nombres or len(set(nombres)) != len(nombres):
+            raise LectorNoCompatible("encabezados vacíos o repetidos")
+        tabla = pyarrow.csv.read_csv(
+            fuente(),
+            read_options=opciones_lectura,
+            parse_options=opciones_formato,
+            convert_options=pyarrow.csv.ConvertOptions(
+                column_types={nombre: pa.string() for nombre in nombres},
+                null_values=VALORES_NULOS,
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=True
+            )
+        )
+    except pa.ArrowInvalid as e:
+        # ..ej: filas con más o menos columnas que el encabezado
+        raise LectorNoCompatible(str(e).splitlines()[0])
+
+    # ..el motor C corta los textos en el carácter NUL; pyarrow los conserva
+    import pyarrow.compute
+    for columna in tabla.columns:
+        if pyarrow.compute.any(pyarrow.compute.match_substring(columna, '\x00')).as_py():
+            raise LectorNoCompatible("el archivo contiene caracteres NUL")
+    return tabla.to_pandas(types_mapper=pd.ArrowDtype)
+
+def leer_csv(archivo, encoding, delimitador, tamano_bloque=None, lector=LECTOR, comillas=COMILLAS, **opciones):
+    """
+    Lee un CSV con todas las celdas como texto, con el delimitador y las
+    comillas detectados (ver deteccion.detectar_dialecto).
+    Si se indica tamano_bloque devuelve un iterador de DataFrames.
+    lector='pyarrow' usa pyarrow.csv cuando es compatible (ver usa_pyarrow);
+    si no, o si el archivo no se puede leer igual, usa el motor C.
+    archivo puede ser una ruta, un archivo abierto o un entrada.ArchivoMapeado.
+    """
+    if usa_pyarrow(lector, tamano_bloque, opciones):
+        try:
+            return leer_csv_pyarrow(archivo, encoding, delimitador, comillas)
+        except LectorNoCompatible as e:
+            logger.info(f"Lector pyarrow no aplicable ({e}); se usa el motor C")
+
+    if isinstance(archivo, ArchivoMapeado):
+        # ..el motor C recorre el mapeo como flujo binario en vez de abrir otra vez el archivo
+        flujo = archivo.flujo()
+        if tamano_bloque:
+            return leer_csv(flujo, encoding, delimitador, tamano_bloque, comillas=comillas, **opciones)
+        with flujo:
+            return leer_csv(flujo, encoding, delimitador, comillas=comillas, **opciones)
+
+    return pd.read_csv(
+        archivo,
+        encoding=encoding,
+        delimiter=delimitador,
+        quotechar=comillas,
+        dtype=str,
+        chunksize=tamano_bloque,
+        **opciones
+    )
+
+def leer_vista_previa(archivo, encoding, delimitador, comillas=COMILLAS, filas=5):
+    """Primeras filas de un CSV; de un ArchivoMapeado sólo se recorre el inicio del mapeo"""
+    if isinstance(archivo, ArchivoMapeado):
+        with archivo.flujo() as flujo:
+            return leer_vista_previa(flujo, encoding, delimitador, comillas, filas)
+    return pd.read_csv(archivo, encoding=encoding, delimiter=delimitador, quotechar=comillas, nrows=filas)
+
+def extension(archivo):
+    """Extensión en minúsculas de una ruta; una tabla de base de datos no tiene"""
+    if es_base_datos(archivo):
+        return ''
+    return Path(archivo).suffix.lower()
+
+def es_excel(archivo):
+    return extension(archivo) in EXTENSIONES_EXCEL
+
+def valor_celda(valor):
+    """Como pandas: números enteros como int y las celdas vacías o de error como nulas"""
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    if isinstance(valor, str) and (valor in VALORES_NULOS or valor in ERRORES_EXCEL):
+        return None
+    return valor
+
+def nombres_columnas(encabezado):
+    """Nombres de columna como los deja pd.read_excel: 'Unnamed: n' y repetidos como 'x.1'"""
+    nombres = []
+    for posicion, nombre in enumerate(encabezado):
+        if nombre is None:
+            nombre = f"Unnamed: {posicion}"
+        base, repeticion = nombre, 1
+        while nombre in nombres:
+            nombre = f"{base}.{repeticion}"
+            repeticion += 1
+        nombres.append(nombre)
+    return nombres
+
+def motor_excel():
+    """'calamine' si python-calamine está instalado; None deja el motor por defecto de pandas"""
+    try:
+        import python_calamine
+    except ImportError:
+        return None
+    return 'calamine'
+
+def hojas_excel(archivo):
+    """Nombres de las hojas de un Excel, en orden"""
+    with pd.ExcelFile(archivo, engine=motor_excel()) as libro:
+        return list(libro.sheet_names)
+
+def filas_excel(archivo, hoja=0):
+    """
+    Recorre una hoja de un Excel (nombre o posición) sin cargarla completa.
+    Devuelve el total de filas estimado (None si el archivo no lo declara) y
+    un iterador de filas como tuplas de valores.
+    """
+    if motor_excel() == 'calamine':
+        from python_calamine import CalamineWorkbook
+        libro = CalamineWorkbook.from_path(str(archivo))
+        if isinstance(hoja, str):
+            hoja = libro.get_sheet_by_name(hoja)
+        else:
+            hoja = libro.get_sheet_by_index(hoja)
+        # ..calamine entrega '' en las celdas vacías
+        filas = (tuple(None if valor == '' else valor for valor in fila) for fila in hoja.iter_rows())
+        return hoja.total_height, filas
+
+    from openpyxl import load_workbook
+
+    libro = load_workbook(archivo, read_only=True, data_only=True, keep_links=False)
+    hoja = libro[hoja] if isinstance(hoja, str) else libro.worksheets[hoja]
+    total = hoja.max_row
+    # ..la dimensión declarada puede ser incorrecta; sin ella se leen todas las filas
+    hoja.reset_dimensions()
+
+    def recorrer():
+        try:
+            yield from hoja.iter_rows(values_only=True)
+        finally:
+            libro.close()
+
+    return total, recorrer()
+
+def leer_excel_en_bloques(archivo, tamano_bloque=TAMANO_BLOQUE, hoja=0):
+    """
+    Lee una hoja de un Excel (la primera por defecto) en bloques de filas. Entrega pares
+    (DataFrame, fraccion), con fraccion la proporción de filas ya leída.
+
+    Las celdas quedan con el valor que guarda Excel (texto, número o fecha),
+    sin la inferencia de tipos de pd.read_excel, para que una columna no
+    cambie de tipo de un bloque a otro. Como en pd.read_excel, las filas
+    vacías al final de la hoja se omiten y las intermedias quedan como nulas.
+    """
+    total, filas = filas_excel(archivo, hoja)
+    nombres = None
+    bloque = []
+    leidas = entregados = vacias = 0
+
+    def armar():
+        df = pd.DataFrame(bloque, columns=nombres, dtype=object)
+        return df, min(leidas / total, 1.0) if total else 0.0
+
+    for fila in filas:
+        leidas += 1
+        fila = [valor_celda(valor) for valor in fila]
+        if all(valor is None for valor in fila):
+            vacias += nombres is not None
+            continue
+        if nombres is None:
+            while fila and fila[-1] is None:
+                fila.pop()
+            nombres = nombres_columnas(fila)
+            continue
+        # ..las filas más cortas se completan y las celdas sin encabezado se descartan
+        fila = fila[:len(nombres)] + [None] * (len(nombres) - len(fila))
+        bloque.extend([[None] * len(nombres)] * vacias)
+        bloque.append(fila)
+        vacias = 0
+        if len(bloque) >= tamano_bloque:
+            yield armar()
+            entregados += 1
+            bloque = []
+
+    # ..una hoja sin filas de datos entrega un bloque vacío, como pd.read_excel
+    if bloque or not entregados:
+        nombres = nombres or []
+        yield armar()
+
+def leer_excel(archivo, hoja=0):
+    """
+    Lee una hoja completa con las celdas tal como las guarda Excel, igual que
+    leer_excel_en_bloques (un texto "007" sigue siendo "007"), para que el
+    proceso en memoria y por bloques entreguen lo mismo. Un .xls, que
+    openpyxl no abre, se lee con pd.read_excel sin inferir tipos.
+    """
+    if es_excel(archivo):
+        return pd.concat([df for df, fraccion in leer_excel_en_bloques(archivo, hoja=hoja)], ignore_index=True)
+    return pd.read_excel(archivo, sheet_name=hoja, engine=motor_excel(), dtype=object)
+
+#...................................................... | ESCRITURA
+def escribir_csv(df, salida, encabezado=True, **opciones):
+    """Escribe un DataFrame normalizado (ruta o archivo abierto) en UTF-8"""
+    df.to_csv(salida, index=False, header=encabezado, encoding='utf-8', **opciones)
+
+def es_csv(archivo):
+    return extension(archivo) == '.csv'
+
+def mapear_csv(archivo):
+    """
+    Contexto con el CSV mapeado en memoria (entrada.ArchivoMapeado) o, si no
+    es CSV, con la ruta tal cual. El mapeo se cierra al salir del with,
+    termine bien o con error: mientras está abierto, Windows bloquea el archivo.
+    """
+    return ArchivoMapeado(archivo) if es_csv(archivo) else nullcontext(archivo)
+
+def es_columnar(archivo):
+    return extension(archivo) in FORMATOS_COLUMNARES
+
+def es_base_datos(salida):
+    """La salida es una tabla (base_datos.TablaDestino) y no un archivo"""
+    return isinstance(salida, base_datos.TablaDestino)
+
+def ruta_parcial(salida):
+    """Archivo temporal junto a la salida (misma extensión) mientras se escribe por bloques"""
+    ruta = Path(salida)
+    return ruta.with_name(f"{ruta.stem}.parcial{ruta.suffix}")
+
+def tamano_salida(salida):
+    """Bytes escritos en la salida (None si es una tabla de base de datos)"""
+    return None if es_base_datos(salida) else os.path.getsize(salida)
+
+def admite_bloques(archivo_entrada, archivo_salida):
+    """El modo por bloques lee CSV o XLSX y escribe CSV, XLSX, un formato columnar o una tabla"""
+    return (es_csv(archivo_entrada) or es_excel(archivo_entrada)) and (
+        es_csv(archivo_salida) or es_columnar(archivo_salida) or es_excel(archivo_salida)
+        or es_base_datos(archivo_salida)
+    )
+
+def compresion_columnar(salida, compresion=None):
+    """Valida la compresión para la salida columnar; None usa la del formato"""
+    formato = FORMATOS_COLUMNARES[Path(salida).suffix.lower()]
+    compresion = compresion or COMPRESIONES[formato][0]
+    if compresion not in COMPRESIONES[formato]:
+        raise ValueError(
+            f"Compresión {compresion!r} no válida para {formato}; "
+            f"opciones: {', '.join(COMPRESIONES[formato])}"
+        )
+    return compresion
+
+class EscritorCsv:
+    """Agrega bloques a un CSV; el encabezado se escribe sólo con el primero"""
+
+    def __init__(self, salida, **opciones):
+        self.archivo = open(salida, 'w', encoding='utf-8', newline='')
+        self.opciones = opciones
+        self.bloques = 0
+
+    def escribir(self, df):
+        escribir_csv(df, self.archivo, encabezado=(self.bloques == 0), **self.opciones)
+        self.bloques += 1
+
+    def cerrar(self):
+        self.archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+class EscritorColumnar:
+    """
+    Escribe bloques en Parquet (un row group por bloque) o Arrow IPC / Feather
+    (un record batch por bloque). El esquema lo fija el primer bloque.
+
+    Sólo las columnas que la variante entrega como números (dtype numérico,
+    ej: _MONTO y _HORAS) se guardan con su tipo; todas las demás, incluidas
+    las fechas %Y-%m-%d y los números que pasan sin normalizar, como string.
+    Así el esquema no depende del contenido del primer bloque: es el mismo en
+    memoria y por bloques, y un bloque posterior nunca deja de calzar.
+    compresion None usa la del formato (snappy en Parquet, lz4 en Arrow);
+    'ninguna' escribe sin comprimir.
+    """
+
+    def __init__(self, salida, compresion=None):
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError("Para escribir Parquet o Arrow/Feather se necesita pyarrow (pip install pyarrow)")
+        self.pa = pyarrow
+        self.salida = salida
+        self.formato = FORMATOS_COLUMNARES[Path(salida).suffix.lower()]
+        compresion = compresion_columnar(salida, compresion)
+        self.compresion = None if compresion == 'ninguna' else compresion
+        self.esquema = None
+        self.escritor = None
+
+    def columna_texto(self, serie):
+        """Columna como string de Arrow (el dtype str de pandas llega como large_string)"""
+        pa = self.pa
+        try:
+            return pa.Array.from_pandas(serie).cast(pa.string())
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            # ..objetos de distintos tipos (ej: celdas de Excel)
+            valores = serie.astype(object).where(serie.notna(), None)
+            return pa.array([None if valor is None else str(valor) for valor in valores], type=pa.string())
+
+    def tabla(self, df):
+        pa = self.pa
+        arreglos = []
+        for posicion, nombre in enumerate(df.columns):
+            serie = df.iloc[:, posicion]
+            if self.esquema is not None:
+                tipo = self.esquema.field(posicion).type
+            elif pd.api.types.is_numeric_dtype(serie):
+                tipo = None
+            else:
+                tipo = pa.string()
+            if tipo == pa.string():
+                arreglo = self.columna_texto(serie)
+            else:
+                arreglo = pa.Array.from_pandas(serie)
+                if tipo is not None:
+                    arreglo = arreglo.cast(tipo)
+            arreglos.append(arreglo)
+        return pa.Table.from_arrays(arreglos, names=[str(nombre) for nombre in df.columns])
+
+    def escribir(self, df):
+        tabla = self.tabla(df)
+        if self.escritor is None:
+            self.esquema = tabla.schema
+            if self.formato == 'parquet':
+                import pyarrow.parquet
+                self.escritor = pyarrow.parquet.ParquetWriter(
+                    self.salida, self.esquema, compression=self.compresion or 'none'
+                )
+            else:
+                import pyarrow.ipc
+                opciones = pyarrow.ipc.IpcWriteOptions(compression=self.compresion)
+                self.escritor = pyarrow.ipc.new_file(self.salida, self.esquema, options=opciones)
+        self.escritor.write_table(tabla)
+
+    def cerrar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+class EscritorExcel:
+    """
+    Agrega bloques a un XLSX con openpyxl en modo write_only: cada fila se
+    vuelca a un archivo temporal al agregarla y el libro se arma al cerrar,
+    sin tener todas las celdas en memoria. El encabezado lleva el mismo
+    formato que usa df.to_excel. Con nueva_hoja los bloques siguientes van a
+    otra hoja del mismo libro.
+    """
+
+    def __init__(self, salida, hoja=HOJA_EXCEL):
+        from openpyxl import Workbook
+        self.salida = salida
+        self.libro = Workbook(write_only=True)
+        self.nueva_hoja(hoja)
+
+    def nueva_hoja(self, nombre):
+        self.hoja = self.libro.create_sheet(nombre)
+        self.filas = 0
+        self.con_encabezado = False
+
+    def encabezado(self, columnas):
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Border, Font, Side
+
+        borde = Side(style='thin')
+        celdas = []
+        for nombre in columnas:
+            celda = WriteOnlyCell(self.hoja, value=nombre)
+            celda.font = Font(bold=True)
+            celda.border = Border(top=borde, bottom=borde, left=borde, right=borde)
+            celda.alignment = Alignment(horizontal='center', vertical='top')
+            celdas.append(celda)
+        self.hoja.append(celdas)
+
+    def escribir(self, df):
+        if self.filas + len(df) + 1 > MAXIMO_FILAS_EXCEL:
+            raise ValueError(
+                f"La salida Excel admite como máximo {MAXIMO_FILAS_EXCEL - 1} filas de datos; "
+                "escriba CSV, Parquet o Arrow"
+            )
+        if not self.con_encabezado:
+            self.encabezado(df.columns)
+            self.con_encabezado = True
+        # ..nulos (NaN, NaT, pd.NA) como celdas vacías y tipos numpy como tipos de Python
+        valores = df.astype(object).where(df.notna(), None)
+        for fila in valores.itertuples(index=False, name=None):
+            self.hoja.append(fila)
+        self.filas += len(df)
+
+    def cerrar(self):
+        self.libro.save(self.salida)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+def abrir_escritor(salida, opciones_escritura=None, compresion=None, es_columna_fecha=None):
+    """Escritor por bloques según la extensión de la salida (CSV, XLSX o columnar) o una tabla"""
+    if es_base_datos(salida):
+        return base_datos.EscritorBaseDatos(salida, es_columna_fecha)
+    if es_columnar(salida):
+        return EscritorColumnar(salida, compresion)
+    if es_excel(salida):
+        return EscritorExcel(salida)
+    return EscritorCsv(salida, **(opciones_escritura or {}))
+
+def escribir_archivo(df, salida, opciones_escritura=None, compresion=None, es_columna_fecha=None):
+    """Escribe un DataFrame completo: CSV, Parquet/Arrow o XLSX según la extensión, o en una tabla"""
+    if es_csv(salida):
+        escribir_csv(df, salida, **(opciones_escritura or {}))
+    elif es_columnar(salida) or es_excel(salida) or es_base_datos(salida):
+        with abrir_escritor(salida, opciones_escritura, compresion, es_columna_fecha) as escritor:
+            escritor.escribir(df)
+    else:
+        df.to_excel(salida, index=False)
+
+#...................................................... | CANCELACIÓN
+class ProcesoCancelado(Exception):
+    """El usuario canceló la normalización"""
+
+def revisar_cancelacion(cancelar):
+    """cancelar es un threading.Event (o None); se revisa entre bloques y columnas"""
+    if cancelar is not None and cancelar.is_set():
+        raise ProcesoCancelado("Normalización cancelada por el usuario")
+
+#...................................................... | PROCESO POR BLOQUES
+def normalizar_csv_en_bloques(archivo_entrada, archivo_salida, transformar, encoding, delimitador,
+                              tamano_bloque=TAMANO_BLOQUE, opciones_lectura=None,
+                              opciones_escritura=None, al_avanzar=None, cancelar=None,
+                              compresion=None, es_columna_fecha=None, comillas=COMILLAS):
+    """
+    Normaliza un CSV bloque a bloque y agrega cada bloque a la salida (CSV, XLSX,
+    Parquet o Arrow/Feather según la extensión).
+
+    transformar recibe un DataFrame y devuelve el DataFrame normalizado.
+    al_avanzar(numero_bloque, filas_escritas, fraccion) se llama tras cada bloque;
+    fraccion es la proporción del archivo de entrada ya leída (0 a 1).
+    La salida aparece sólo si se completa (ver escribir_bloques).
+    Devuelve el total de filas escritas.
+    """
+    opciones_lectura = opciones_lectura or {}
+    tamano_total = os.path.getsize(archivo_entrada) or 1
+
+    with abrir_binario(archivo_entrada) as entrada:
+        lector = leer_csv(entrada, encoding, delimitador, tamano_bloque, comillas=comillas, **opciones_lectura)
+        bloques = ((bloque, min(entrada.tell() / tamano_total, 1.0)) for bloque in lector)
+        return escribir_bloques(
+            bloques, archivo_salida, transformar, opciones_escritura, al_avanzar, cancelar,
+            compresion, es_columna_fecha
+        )
+
+def normalizar_excel_en_bloques(archivo_entrada, archivo_salida, transformar, tamano_bloque=TAMANO_BLOQUE,
+                                opciones_escritura=None, al_avanzar=None, cancelar=None,
+                                compresion=None, es_columna_fecha=None):
+    """
+    Como normalizar_csv_en_bloques para la primera hoja de un XLSX, leída
+    fila a fila (ver leer_excel_en_bloques).
+    """
+    return escribir_bloques(
+        leer_excel_en_bloques(archivo_entrada, tamano_bloque), archivo_salida, transformar,
+        opciones_escritura, al_avanzar, cancelar, compresion, es_columna_fecha
+    )
+
+def escribir_bloques(bloques, archivo_salida, transformar, opciones_escritura=None, al_avanzar=None,
+                     cancelar=None, compresion=None, es_columna_fecha=None):
+    """
+    Normaliza y escribe pares (DataFrame, fraccion leída) en la salida.
+    Los bloques se escriben en un archivo temporal que reemplaza a la salida
+    al terminar; si se cancela o falla la lectura o la normalización de un
+    bloque, el temporal se elimina y no queda una salida incompleta (en una
+    tabla se deshace la transacción en curso).
+    Devuelve el total de filas escritas.
+    """
+    filas = 0
+    bloques = iter(bloques)
+    tabla = es_base_datos(archivo_salida)
+    destino = archivo_salida if tabla else ruta_parcial(archivo_salida)
+    try:
+        with abrir_escritor(destino, opciones_escritura, compresion, es_columna_fecha) as salida:
+            for numero in itertools.count(1):
+                # ..la lectura de cada bloque ocurre al pedir el siguiente al lector
+                with instrumentacion.etapa('lectura_bloque', bloque=numero) as medicion:
+                    siguiente = next(bloques, None)
+                    medicion['filas'] = 0 if siguiente is None else len(siguiente[0])
+                if siguiente is None:
+                    break
+                bloque, fraccion = siguiente
+                with instrumentacion.etapa('normalizacion_bloque', bloque=numero, filas=len(bloque)):
+                    bloque = transformar(bloque)
+                with instrumentacion.etapa('escritura_bloque', bloque=numero, filas=len(bloque)):
+                    salida.escribir(bloque)
+                filas += len(bloque)
+                if al_avanzar:
+                    al_avanzar(numero, filas, fraccion)
+                revisar_cancelacion(cancelar)
+    except BaseException:
+        if not tabla and os.path.exists(destino):
+            os.remove(destino)
+        raise
+
+    if not tabla:
+        os.replace(destino, archivo_salida)
+    return filas
+
+#...................................................... | PROCESAMIENTO POR COLUMNAS Y EN PARALELO
+def crear_ejecutor(trabajadores):
+    """Pool de procesos reutilizable entre bloques; con un solo proceso entrega None"""
+    if trabajadores <= 1:
+        return nullcontext()
+    return ProcessPoolExecutor(max_workers=trabajadores, initializer=instrumentacion.iniciar_trabajador)
+
+def columnas_resultado(df, normalizar_datos):
+    """Columnas, en orden, que produce normalizar_datos sobre df (se aplica a 0 filas)"""
+    with instrumentacion.sin_registro():
+        return normalizar_datos(df.iloc[:0].copy()).columns
+
+def normalizar_por_columnas(df, normalizar_datos, ejecutor=None, cache=None, al_columna=None, cancelar=None):
+    """
+    Aplica normalizar_datos (función de módulo: DataFrame -> DataFrame) columna
+    a columna, en este proceso o como una tarea por columna en el pool.
+    al_columna(numero, total) se llama al terminar cada columna.
+    El resultado conserva el orden de columnas que produce normalizar_datos al
+    procesar todo de una vez.
+    """
+    if df.empty:
+        return normalizar_datos(df, cache)
+
+    # ..el orden final de columnas se obtiene aplicando la función a 0 filas
+    orden = columnas_resultado(df, normalizar_datos)
+    partes = [df.iloc[:, [posicion]] for posicion in range(len(df.columns))]
+
+    if ejecutor:
+        futuros = [ejecutor.submit(normalizar_datos, parte) for parte in partes]
+        resultados = (futuro.result() for futuro in futuros)
+    else:
+        futuros = []
+        resultados = (normalizar_datos(parte, cache) for parte in partes)
+
+    normalizadas = []
+    try:
+        for numero, resultado in enumerate(resultados, start=1):
+            normalizadas.append(resultado)
+            if al_columna:
+                al_columna(numero, len(partes))
+            revisar_cancelacion(cancelar)
+    except ProcesoCancelado:
+        for futuro in futuros:
+            futuro.cancel()
+        raise
+    return pd.concat(normalizadas, axis=1)[orden]
+
+def normalizar_en_paralelo(df, normalizar_datos, ejecutor, trabajadores, al_columna=None, cancelar=None):
+    """
+    Reparte normalizar_datos en el pool: una tarea por columna, o un bloque de
+    filas por proceso cuando hay menos columnas que procesos.
+    """
+    if df.empty or len(df.columns) >= trabajadores:
+        return normalizar_por_columnas(df, normalizar_datos, ejecutor, al_columna=al_columna, cancelar=cancelar)
+
+    orden = columnas_resultado(df, normalizar_datos)
+    limites = np.linspace(0, len(df), trabajadores + 1).astype(int)
+    partes = [df.iloc[inicio:fin] for inicio, fin in zip(limites[:-1], limites[1:]) if fin > inicio]
+    return pd.concat(list(ejecutor.map(normalizar_datos, partes)), axis=0)[orden]
+
+#...................................................... | LIBROS CON VARIAS HOJAS
+def elegir_hojas(archivo, hojas=None):
+    """
+    Nombres de las hojas a procesar: todas con hojas None, o las indicadas
+    por nombre o posición (desde 0), sin repetir y en el orden pedido.
+    """
+    nombres = hojas_excel(archivo)
+    if hojas is None:
+        return nombres
+    elegidas = []
+    for hoja in hojas:
+        if hoja not in nombres and str(hoja).isdigit():
+            if int(hoja) >= len(nombres):
+                raise ValueError(f"El libro tiene {len(nombres)} hojas; no existe la hoja {hoja}")
+            hoja = nombres[int(hoja)]
+        elif hoja not in nombres:
+            raise ValueError(f"No existe la hoja {hoja!r}; hojas del libro: {', '.join(nombres)}")
+        if hoja not in elegidas:
+            elegidas.append(hoja)
+    return elegidas
+
+def ruta_hoja(archivo_salida, hoja):
+    """Salida de una hoja cuando cada una va a su propio archivo: <nombre>_<hoja>.<ext>"""
+    salida = Path(archivo_salida)
+    nombre = re.sub(r'[^\w\-]+', '_', hoja).strip('_') or 'hoja'
+    return salida.with_name(f"{salida.stem}_{nombre}{salida.suffix}")
+
+def normalizar_hoja(archivo_entrada, hoja, variante, archivo_salida=None, compresion=None, cache=None):
+    """
+    Lee y normaliza una hoja (función de módulo para enviarla a un proceso).
+    Con archivo_salida la escribe y devuelve (filas, segundos); si no,
+    devuelve (DataFrame normalizado, segundos).
+    """
+    inicio = time.perf_counter()
+    contexto = dict(archivo=Path(str(archivo_entrada)).name, hoja=str(hoja), variante=variante.nombre)
+    with instrumentacion.etapa('lectura', **contexto) as medicion:
+        df = variante.normalizar_encabezados(leer_excel(archivo_entrada, hoja))
+        medicion['filas'] = len(df)
+    with instrumentacion.etapa('datos', filas=len(df), **contexto):
+        df = variante.preparar(df)(df, cache)
+    if archivo_salida is None:
+        return df, time.perf_counter() - inicio
+    with instrumentacion.etapa('escritura', filas=len(df), **contexto) as medicion:
+        escribir_archivo(df, archivo_salida, variante.opciones_escritura, compresion, variante.es_columna_fecha)
+        medicion['bytes_escritos'] = tamano_salida(archivo_salida)
+    return len(df), time.perf_counter() - inicio
+
+def normalizar_libro(archivo_entrada, archivo_salida, variante, hojas=None, ejecutor=None, cache=None,
+                     al_avanzar=None, cancelar=None, compresion=None):
+    """
+    Normaliza varias hojas de un Excel (todas, o las de hojas; ver
+    elegir_hojas). Con ejecutor cada hoja es una tarea del pool.
+
+    Si la salida es XLSX se escribe un libro con una hoja normalizada por
+    cada hoja de entrada, con el mismo nombre; si es CSV, Parquet o
+    Arrow/Feather, cada hoja va a su propio archivo (ver ruta_hoja).
+    al_avanzar(fraccion, mensaje) informa cada hoja terminada con sus filas
+    y segundos. Si se cancela, se eliminan las salidas ya escritas.
+    Devuelve {hoja: filas escritas} en el orden de las hojas.
+    """
+    def informar(fraccion, mensaje):
+        if al_avanzar:
+            al_avanzar(fraccion, mensaje)
+
+    if es_columnar(archivo_salida):
+        compresion_columnar(archivo_salida, compresion)
+
+    nombres = elegir_hojas(archivo_entrada, hojas)
+    un_libro = es_excel(archivo_salida)
+    destinos = {hoja: None if un_libro else ruta_hoja(archivo_salida, hoja) for hoja in nombres}
+    resultados = {}
+
+    def terminar(hoja, resultado, segundos):
+        resultados[hoja] = resultado
+        filas = len(resultado) if un_libro else resultado
+        # ..con un solo libro el último 10% es la escritura
+        fraccion = len(resultados) / len(nombres) * (0.9 if un_libro else 1.0)
+        informar(fraccion, f"Hoja {hoja} normalizada ({filas} filas, {segundos:.1f} s)")
+
+    futuros = {}
+    try:
+        if ejecutor:
+            futuros = {
+                ejecutor.submit(normalizar_hoja, archivo_entrada, hoja, variante, destinos[hoja], compresion): hoja
+                for hoja in nombres
+            }
+            for futuro in as_completed(futuros):
+                terminar(futuros[futuro], *futuro.result())
+                revisar_cancelacion(cancelar)
+        else:
+            for hoja in nombres:
+                terminar(hoja, *normalizar_hoja(archivo_entrada, hoja, variante, destinos[hoja], compresion, cache))
+                revisar_cancelacion(cancelar)
+
+        if un_libro:
+            with EscritorExcel(archivo_salida, nombres[0]) as libro:
+                for posicion, hoja in enumerate(nombres):
+                    if posicion:
+                        libro.nueva_hoja(hoja)
+                    libro.escribir(resultados[hoja])
+                    resultados[hoja] = len(resultados[hoja])
+            informar(1.0, f"Libro guardado ({len(nombres)} hojas)")
+    except ProcesoCancelado:
+        # ..las hojas en curso terminan antes de borrar lo que alcanzaron a escribir
+        for futuro in futuros:
+            futuro.cancel()
+        for futuro in futuros:
+            if not futuro.cancelled():
+                futuro.exception()
+        for salida in [archivo_salida, *destinos.values()]:
+            if salida is not None and os.path.exists(salida):
+                os.remove(salida)
+        raise
+
+    return {hoja: resultados[hoja] for hoja in nombres}
+
+#...................................................... | ARCHIVO COMPLETO
+def normalizar_archivo(archivo_entrada, archivo_salida, variante, encoding=None, delimitador=None,
+                       tamano_bloque=None, ejecutor=None, trabajadores=1, cache=None,
+                       al_avanzar=None, cancelar=None, compresion=None, lector=LECTOR, comillas=COMILLAS):
+    """
+    Normaliza un archivo con las reglas de una variante (ver variantes.py), sin
+    interfaz gráfica. Con tamano_bloque, entrada CSV o XLSX y salida CSV, XLSX o
+    columnar, procesa por bloques; con ejecutor reparte las columnas entre procesos.
+    compresion se usa en las salidas Parquet y Arrow/Feather; lector elige el
+    lector CSV en memoria ('c' o 'pyarrow', ver leer_csv) y comillas es el
+    carácter de comillas del CSV.
+
+    al_avanzar(fraccion, mensaje) informa el avance tras cada bloque o, en
+    memoria, tras cada columna. cancelar (threading.Event) detiene el proceso
+    entre bloques o columnas con ProcesoCancelado.
+    Devuelve el total de filas escritas.
+    """
+    def informar(fraccion, mensaje):
+        if al_avanzar:
+            al_avanzar(fraccion, mensaje)
+
+    # ..una compresión inválida se informa antes de leer y normalizar
+    if es_columnar(archivo_salida):
+        compresion_columnar(archivo_salida, compresion)
+
+    # ..datos comunes de las etapas que se registran (ver instrumentacion.py)
+    contexto = dict(archivo=Path(str(archivo_entrada)).name, variante=variante.nombre)
+    tamano_entrada = os.path.getsize(archivo_entrada)
+
+    if tamano_bloque and admite_bloques(archivo_entrada, archivo_salida):
+        normalizar_datos = None
+
+        def transformar(df):
+            nonlocal normalizar_datos
+            df = variante.normalizar_encabezados(df)
+            # ..las columnas se clasifican con el primer bloque y así quedan para el resto
+            if normalizar_datos is None:
+                normalizar_datos = variante.preparar(df)
+            if ejecutor:
+                return normalizar_en_paralelo(df, normalizar_datos, ejecutor, trabajadores)
+            return normalizar_datos(df, cache)
+
+        opciones = dict(
+            tamano_bloque=tamano_bloque,
+            opciones_escritura=variante.opciones_escritura,
+            al_avanzar=lambda numero, filas, fraccion: informar(
+                fraccion, f"Bloque {numero} normalizado ({filas} filas escritas)"
+            ),
+            cancelar=cancelar,
+            compresion=compresion,
+            es_columna_fecha=variante.es_columna_fecha
+        )
+        with instrumentacion.etapa('bloques', bytes_leidos=tamano_entrada, **contexto) as medicion:
+            if es_excel(archivo_entrada):
+                filas = normalizar_excel_en_bloques(archivo_entrada, archivo_salida, transformar, **opciones)
+            else:
+                filas = normalizar_csv_en_bloques(
+                    archivo_entrada, archivo_salida, transformar, encoding, delimitador,
+                    opciones_lectura=variante.opciones_lectura, comillas=comillas, **opciones
+                )
+            medicion['filas'] = filas
+            medicion['bytes_escritos'] = tamano_salida(archivo_salida)
+        return filas
+
+    # ..en memoria: lectura, columnas y escritura reparten el avance 20/70/10
+    with instrumentacion.etapa('lectura', bytes_leidos=tamano_entrada, **contexto) as medicion:
+        if es_csv(archivo_entrada):
+            df = leer_csv(archivo_entrada, encoding, delimitador, lector=lector, comillas=comillas,
+                          **variante.opciones_lectura)
+        else:
+            df = leer_excel(archivo_entrada)
+        medicion['filas'] = len(df)
+    informar(0.2, f"Archivo leído ({len(df)} filas, {len(df.columns)} columnas)")
+    revisar_cancelacion(cancelar)
+
+    with instrumentacion.etapa('encabezados', filas=len(df), **contexto):
+        df = variante.normalizar_encabezados(df)
+    with instrumentacion.etapa('clasificacion', filas=len(df), **contexto):
+        normalizar_datos = variante.preparar(df)
+
+    def al_columna(numero, total):
+        informar(0.2 + 0.7 * numero / total, f"Columna {numero}/{total} normalizada")
+
+    with instrumentacion.etapa('datos', filas=len(df), **contexto):
+        if ejecutor:
+            df = normalizar_en_paralelo(df, normalizar_datos, ejecutor, trabajadores, al_columna, cancelar)
+        else:
+            df = normalizar_por_columnas(df, normalizar_datos, cache=cache, al_columna=al_columna,
+                                         cancelar=cancelar)
+
+    with instrumentacion.etapa('escritura', filas=len(df), **contexto) as medicion:
+        escribir_archivo(df, archivo_salida, variante.opciones_escritura, compresion, variante.es_columna_fecha)
+        medicion['bytes_escritos'] = tamano_salida(archivo_salida)
+    informar(1.0, f"Archivo guardado ({len(df)} filas)")
+    return len(df)
+
+#...................................................... | END
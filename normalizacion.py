@@ -0,0 +1,644 @@
+"""
+NORMALIZACIÓN VECTORIZADA DE TEXTO
+Desarrollado por Felipe Alexander Correa Rodríguez
+
+Versión por columna de normalizar_texto de cada script. Cada normalización
+se declara como un perfil: una lista ordenada de pasos (recortar, quitar
+caracteres, unificar separadores, transliterar, filtrar, mayúsculas) que se
+compila una sola vez. Los pasos consecutivos que actúan carácter a carácter
+se reducen a una tabla de traducción precompilada (para el rango latin-1), unificar separadores a una tabla más el colapso de
+repeticiones y recortar a .str.strip de pandas sobre la columna.
+
+La tabla se aplica sobre la columna completa unida en un solo texto (separada
+por NUL) codificada en latin-1, con bytes.translate; sólo los caracteres fuera
+de latin-1 pasan por los pasos uno a uno.
+
+El paso transliterar (también usado por normalizar_texto de los scripts) es
+transliterar(): los textos ASCII se devuelven tal cual, los caracteres
+latin-1 y cp1252 (€, “, ”, —, Š, etc.) salen de una tabla para str.translate
+precalculada con unidecode y sólo los demás pasan por unidecode. Con
+"python normalizacion.py" se verifica la tabla contra unidecode carácter a
+carácter.
+
+Cada columna se factoriza antes de normalizar: sólo se normalizan los valores
+únicos y el resultado se reparte a todas las celdas. Opcionalmente se consulta
+una caché LRU acotada que puede compartirse entre columnas y archivos y,
+detrás de ella, una caché persistente en SQLite compartida entre corridas.
+
+El resultado es idéntico al de normalizar_texto del script respectivo:
+- PERFILES['basico']    / normalizar_serie_basico    -> normalizadorhdc.py
+- PERFILES['universal'] / normalizar_serie_universal -> normalizador.py
+- PERFILES['final']     / normalizar_serie_final     -> normalizadorfinal.py
+"""
+
+#...................................................... | STACK DE LIBRERÍAS
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from importlib import metadata
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import unidecode
+import instrumentacion
+
+#...................................................... | CONFIGURACIÓN
+# ..separador de celdas al unir una columna; ninguna etapa lo crea ni lo elimina
+SEPARADOR = '\x00'
+# ..con grupo, para que re.split entregue alternados los tramos latin-1 y los demás
+FUERA_LATIN1 = re.compile('([^\x00-\xff]+)')
+# ..subir al cambiar cualquier regla de normalización (texto o fechas): invalida los
+# ..manifiestos incrementales y los valores de la caché persistente
+VERSION_REGLAS = 1
+CAPACIDAD_CACHE = 200_000
+CAPACIDAD_PERSISTENTE = 2_000_000
+RUTA_CACHE_PERSISTENTE = Path.home() / '.normcsv' / 'cache_normalizacion.sqlite'
+# ..valores por consulta IN (...) a SQLite, bajo su límite de parámetros
+LOTE_SQLITE = 500
+# ..columnas con más de esta proporción de valores únicos no usan la caché LRU
+UMBRAL_UNICOS = 0.5
+# ..pasos que transforman cada carácter por separado y se reducen a una tabla
+PASOS_CARACTER = ('quitar', 'transliterar', 'filtrar', 'mayusculas')
+RECORTAR = 'recortar'
+# ..caracteres de la tabla de transliteración: latin-1 completo y lo que cp1252 agrega en 0x80-0x9f
+CARACTERES_TRANSLITERACION = (
+    ''.join(map(chr, range(0x100)))
+    + bytes(range(0x80, 0xa0)).decode('cp1252', errors='ignore')
+)
+
+#...................................................... | TRANSLITERACIÓN
+# ..unidecode deja el ASCII igual; la tabla sólo guarda los demás caracteres
+TABLA_TRANSLITERACION = {
+    ord(caracter): unidecode.unidecode(caracter)
+    for caracter in CARACTERES_TRANSLITERACION if not caracter.isascii()
+}
+
+def transliterar(texto):
+    """
+    Equivalente a unidecode.unidecode(texto). Los reemplazos de la tabla son
+    ASCII, así que unidecode sólo se llama si quedan caracteres fuera de ella.
+    """
+    if texto.isascii():
+        return texto
+    texto = texto.translate(TABLA_TRANSLITERACION)
+    if texto.isascii():
+        return texto
+    return unidecode.unidecode(texto)
+
+def verificar_transliteracion():
+    """
+    Compara transliterar con unidecode para cada carácter de la tabla: solo,
+    repetido, entre ASCII y entre caracteres fuera de la tabla. Devuelve la
+    lista de (texto, transliterar, unidecode) que no coinciden.
+    """
+    fuera = '\u0100\u4e2d\U0001f600'
+    textos = [CARACTERES_TRANSLITERACION]
+    for caracter in CARACTERES_TRANSLITERACION:
+        textos += [caracter, caracter * 3, f'a{caracter}b', f'{fuera}{caracter}{fuera}']
+    diferencias = []
+    for texto in textos:
+        obtenido, esperado = transliterar(texto), unidecode.unidecode(texto)
+        if obtenido != esperado:
+            diferencias.append((texto, obtenido, esperado))
+    return diferencias
+
+#...................................................... | TABLAS PRECOMPILADAS
+class TablaCaracteres:
+    """
+    Equivalente compilado de una secuencia de pasos carácter a carácter
+    (funciones texto -> texto que transforman cada carácter por separado,
+    como unidecode, re.sub de una clase de caracteres o .upper()). La
+    secuencia se evalúa una vez por cada carácter latin-1; sólo los tramos
+    fuera de latin-1 pasan por las funciones.
+    """
+
+    def __init__(self, funciones):
+        self.funciones = funciones
+
+        # ..tabla para str.translate (ASCII y latin-1: á, ñ, ü, º, etc.)
+        self.tabla = {}
+        for codigo in range(0x100):
+            caracter = chr(codigo)
+            resultado = self.aplicar(caracter)
+            if resultado != caracter:
+                self.tabla[codigo] = resultado or None
+        self.tabla_unida = {codigo: resultado for codigo, resultado in self.tabla.items()
+                            if codigo != ord(SEPARADOR)}
+
+        # ..bytes.translate sirve si los reemplazos quedan en latin-1 y la tabla no los vuelve a cambiar
+        reemplazos = ''.join(resultado for resultado in self.tabla_unida.values() if resultado)
+        self.en_bytes = all(ord(c) < 0x100 and ord(c) not in self.tabla_unida for c in set(reemplazos))
+
+        # ..tabla para bytes.translate; los reemplazos de varios caracteres van aparte
+        tabla_bytes = bytearray(range(0x100))
+        borrar = bytearray()
+        self.multiples = []
+        for codigo, resultado in self.tabla_unida.items() if self.en_bytes else ():
+            if resultado is None:
+                borrar.append(codigo)
+            elif len(resultado) == 1:
+                tabla_bytes[codigo] = ord(resultado)
+            else:
+                self.multiples.append((bytes([codigo]), resultado.encode('latin-1')))
+        self.tabla_bytes = bytes(tabla_bytes)
+        self.borrar = bytes(borrar)
+
+    def aplicar(self, texto):
+        """Aplica los pasos sin compilar, en orden"""
+        for funcion in self.funciones:
+            texto = funcion(texto)
+        return texto
+
+    def traducir(self, texto):
+        """Aplica los pasos a un texto, que puede ser una columna unida por SEPARADOR"""
+        try:
+            datos = texto.encode('latin-1')
+        except UnicodeEncodeError:
+            partes = FUERA_LATIN1.split(texto)
+            return ''.join(self.aplicar(parte) if posicion % 2 else self.traducir(parte)
+                           for posicion, parte in enumerate(partes))
+        if not self.en_bytes:
+            return texto.translate(self.tabla_unida)
+        for original, reemplazo in self.multiples:
+            if original in datos:
+                datos = datos.replace(original, reemplazo)
+        return datos.translate(self.tabla_bytes, self.borrar).decode('latin-1')
+
+    def traducir_celda(self, texto):
+        """Versión celda a celda, usada cuando la columna contiene el SEPARADOR"""
+        partes = FUERA_LATIN1.split(texto)
+        return ''.join(self.aplicar(parte) if posicion % 2 else parte.translate(self.tabla)
+                       for posicion, parte in enumerate(partes))
+
+class UnificadorSeparadores:
+    """
+    Equivalente compilado de re.sub(patron, reemplazo, texto) para un patrón
+    [clase]+ cuyo reemplazo es un carácter de la misma clase: en latin-1 los
+    caracteres de la clase pasan a ser el reemplazo con bytes.translate y las
+    repeticiones se colapsan, sin regex.
+    """
+
+    def __init__(self, patron, reemplazo):
+        if not re.fullmatch(r'\[.+\]\+', patron):
+            raise ValueError(f"unificar_separadores espera un patrón [clase]+, no {patron!r}")
+        self.regex = re.compile(patron)
+        self.reemplazo = reemplazo
+        if len(reemplazo) != 1 or ord(reemplazo) > 0xff or not self.regex.fullmatch(reemplazo):
+            raise ValueError(f"El reemplazo {reemplazo!r} debe ser un carácter latin-1 de la clase {patron!r}")
+        if self.regex.fullmatch(SEPARADOR):
+            raise ValueError(f"La clase {patron!r} no puede incluir el separador de celdas")
+
+        # ..bytes latin-1 que calzan con el patrón, para unificarlos sin regex
+        self.tabla = bytes(
+            ord(reemplazo) if self.regex.fullmatch(chr(codigo)) else codigo
+            for codigo in range(0x100)
+        )
+        self.simple = reemplazo.encode('latin-1')
+        self.doble = self.simple * 2
+
+    def traducir(self, texto):
+        try:
+            datos = texto.encode('latin-1')
+        except UnicodeEncodeError:
+            return self.regex.sub(self.reemplazo, texto)
+        datos = datos.translate(self.tabla)
+        while self.doble in datos:
+            datos = datos.replace(self.doble, self.simple)
+        return datos.decode('latin-1')
+
+    def traducir_celda(self, texto):
+        return self.regex.sub(self.reemplazo, texto)
+
+class EtapaUnida:
+    """Pasos consecutivos que se aplican juntos sobre la columna unida por SEPARADOR"""
+
+    def __init__(self, traductores):
+        self.traductores = traductores
+
+    def traducir(self, texto):
+        for traductor in self.traductores:
+            texto = traductor.traducir(texto)
+        return texto
+
+    def traducir_celda(self, texto):
+        for traductor in self.traductores:
+            texto = traductor.traducir_celda(texto)
+        return texto
+
+#...................................................... | UTILIDADES
+def como_texto(serie):
+    """Equivalente por columna de: "" si la celda es nula, si no str(celda)"""
+    nulos = serie.isna()
+    if pd.api.types.infer_dtype(serie, skipna=True) not in ('string', 'empty'):
+        serie = serie.astype(object).map(str)
+    return serie.astype(object).where(~nulos, '')
+
+def aplicar_unido(serie, funcion, funcion_celda):
+    """
+    Aplica funcion (texto -> texto) a la columna completa unida por SEPARADOR
+    y la vuelve a separar. Si alguna celda contiene el separador se usa
+    funcion_celda sobre cada celda.
+    """
+    if serie.empty:
+        return serie
+    unido = SEPARADOR.join(serie)
+    if unido.count(SEPARADOR) != len(serie) - 1:
+        return serie.map(funcion_celda)
+    return pd.Series(funcion(unido).split(SEPARADOR), index=serie.index, dtype=object)
+
+def huella_reglas(*partes):
+    """
+    Identificador de las reglas vigentes: VERSION_REGLAS, la versión de
+    unidecode y las partes indicadas (nombre y pasos de un perfil, etc.).
+    Cambia si cambia cualquiera de ellas.
+    """
+    try:
+        version_unidecode = metadata.version('unidecode')
+    except metadata.PackageNotFoundError:
+        version_unidecode = ''
+    datos = json.dumps([VERSION_REGLAS, version_unidecode, *partes], default=str)
+    return hashlib.sha1(datos.encode('utf-8')).hexdigest()[:16]
+
+#...................................................... | CACHÉ PERSISTENTE
+class CachePersistente:
+    """
+    Diccionario en disco (SQLite) de valores ya normalizados, compartido entre
+    corridas. Cada valor se guarda bajo el espacio "<nombre>:<huella>", con
+    nombre el perfil (o 'fecha') y huella la de huella_reglas: si cambian las
+    reglas cambia el espacio, los valores anteriores dejan de usarse y se
+    eliminan la primera vez que se usa el nombre. Guarda a lo más capacidad
+    valores; al pasarse se eliminan los de las corridas más antiguas.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE_PERSISTENTE, capacidad=CAPACIDAD_PERSISTENTE):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.capacidad = capacidad
+        self.espacios = {}
+        # ..la interfaz gráfica la usa desde el hilo de normalización
+        self.bloqueo = threading.Lock()
+        self.conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+        with self.conexion:
+            self.conexion.execute(
+                "CREATE TABLE IF NOT EXISTS valores ("
+                "espacio TEXT NOT NULL, original TEXT NOT NULL, normalizado TEXT, uso INTEGER NOT NULL, "
+                "PRIMARY KEY (espacio, original)) WITHOUT ROWID"
+            )
+            self.conexion.execute("CREATE INDEX IF NOT EXISTS valores_uso ON valores (uso)")
+        # .."uso" es el número de corrida que usó el valor por última vez
+        ultimo, self.cantidad = self.conexion.execute("SELECT MAX(uso), COUNT(*) FROM valores").fetchone()
+        self.corrida = (ultimo or 0) + 1
+        self.aciertos = 0
+
+    def espacio(self, nombre):
+        """Espacio vigente de nombre; al usarlo por primera vez se borran los de otras reglas"""
+        if nombre not in self.espacios:
+            perfil = PERFILES.get(nombre)
+            espacio = f"{nombre}:{huella_reglas(nombre, perfil.pasos if perfil else None)}"
+            with self.conexion:
+                borrados = self.conexion.execute(
+                    "DELETE FROM valores WHERE substr(espacio, 1, length(?)) = ? AND espacio != ?",
+                    (f"{nombre}:", f"{nombre}:", espacio)
+                ).rowcount
+            self.cantidad -= max(borrados, 0)
+            self.espacios[nombre] = espacio
+        return self.espacios[nombre]
+
+    def obtener(self, nombre, valores):
+        """{valor: normalizado} de los valores que ya están guardados"""
+        encontrados = {}
+        with self.bloqueo:
+            espacio = self.espacio(nombre)
+            for inicio in range(0, len(valores), LOTE_SQLITE):
+                lote = valores[inicio:inicio + LOTE_SQLITE]
+                filas = self.conexion.execute(
+                    f"SELECT original, normalizado FROM valores WHERE espacio = ? "
+                    f"AND original IN ({', '.join('?' * len(lote))})",
+                    [espacio, *lote]
+                )
+                encontrados.update(filas)
+            if encontrados:
+                with self.conexion:
+                    self.conexion.executemany(
+                        "UPDATE valores SET uso = ? WHERE espacio = ? AND original = ?",
+                        ((self.corrida, espacio, valor) for valor in encontrados)
+                    )
+        self.aciertos += len(encontrados)
+        return encontrados
+
+    def guardar(self, nombre, pares):
+        """Guarda pares (valor, normalizado) y elimina los más antiguos si se pasa de la capacidad"""
+        pares = list(pares)
+        with self.bloqueo:
+            espacio = self.espacio(nombre)
+            with self.conexion:
+                antes = self.conexion.total_changes
+                self.conexion.executemany(
+                    "INSERT OR IGNORE INTO valores (espacio, original, normalizado, uso) VALUES (?, ?, ?, ?)",
+                    ((espacio, valor, normalizado, self.corrida) for valor, normalizado in pares)
+                )
+                self.cantidad += self.conexion.total_changes - antes
+                if self.cantidad > self.capacidad:
+                    self.conexion.execute(
+                        "DELETE FROM valores WHERE (espacio, original) IN "
+                        "(SELECT espacio, original FROM valores ORDER BY uso LIMIT ?)",
+                        (self.cantidad - self.capacidad,)
+                    )
+                    self.cantidad = self.capacidad
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+#...................................................... | CACHÉ DE VALORES ÚNICOS
+class CacheNormalizacion:
+    """
+    Caché LRU acotada de valores ya normalizados, compartible entre columnas y
+    archivos. Lleva además las estadísticas de reutilización que se muestran
+    en el log de eventos. Con capacidad 0 sólo cuenta, no guarda valores.
+    Con persistente (CachePersistente) los valores que no están en memoria se
+    buscan en disco antes de normalizarlos, y los normalizados se guardan ahí.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD_CACHE, persistente=None):
+        self.capacidad = capacidad
+        self.valores = OrderedDict()
+        self.persistente = persistente
+        self.reiniciar_estadisticas()
+
+    def reiniciar_estadisticas(self):
+        self.celdas = 0
+        self.unicos = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.aciertos_disco = 0
+
+    def tasa_aciertos(self):
+        consultas = self.aciertos + self.fallos
+        return self.aciertos / consultas if consultas else 0.0
+
+    def normalizar(self, unicos, traducir, nombre):
+        """Normaliza valores únicos consultando primero la caché"""
+        resultado = np.empty(len(unicos), dtype=object)
+        pendientes = []
+        for posicion, valor in enumerate(unicos):
+            clave = (nombre, valor)
+            if clave in self.valores:
+                self.valores.move_to_end(clave)
+                resultado[posicion] = self.valores[clave]
+            else:
+                pendientes.append(posicion)
+        self.aciertos += len(unicos) - len(pendientes)
+        self.fallos += len(pendientes)
+
+        # ..lo que no está en memoria se busca en la caché persistente
+        guardados = {}
+        if pendientes and self.persistente is not None:
+            guardados = self.persistente.obtener(nombre, [unicos.iat[posicion] for posicion in pendientes])
+            self.aciertos_disco += len(guardados)
+        nuevos = [posicion for posicion in pendientes if unicos.iat[posicion] not in guardados]
+        for posicion in pendientes:
+            if unicos.iat[posicion] in guardados:
+                resultado[posicion] = guardados[unicos.iat[posicion]]
+
+        if nuevos:
+            normalizados = traducir(unicos.iloc[nuevos]).to_numpy(dtype=object)
+            resultado[nuevos] = normalizados
+            if self.persistente is not None:
+                self.persistente.guardar(nombre, zip(unicos.iloc[nuevos], normalizados))
+        if pendientes and self.capacidad:
+            for posicion in pendientes:
+                self.valores[(nombre, unicos.iat[posicion])] = resultado[posicion]
+            while len(self.valores) > self.capacidad:
+                self.valores.popitem(last=False)
+        return pd.Series(resultado, index=unicos.index, dtype=object)
+
+    def resumen(self):
+        """Texto con las estadísticas para el log de eventos"""
+        reutilizado = 1 - self.unicos / self.celdas if self.celdas else 0.0
+        texto = (
+            f"Caché de normalización: {self.celdas} celdas, {self.unicos} valores únicos "
+            f"({reutilizado:.1%} reutilizado); caché LRU {self.aciertos}/{self.aciertos + self.fallos} "
+            f"aciertos ({self.tasa_aciertos():.1%}), {len(self.valores)} valores guardados"
+        )
+        if self.persistente is not None:
+            texto += (
+                f"; caché en disco {self.aciertos_disco}/{self.fallos} aciertos, "
+                f"{self.persistente.cantidad} valores guardados"
+            )
+        return texto
+
+def normalizar_unicos(serie, traducir, nombre, cache=None):
+    """
+    Factoriza la columna, normaliza sólo sus valores únicos con traducir
+    (columna de texto -> columna normalizada) y reparte el resultado.
+    Las celdas nulas quedan como "", igual que en normalizar_texto.
+    """
+    if pd.api.types.infer_dtype(serie, skipna=True) not in ('string', 'empty'):
+        serie = como_texto(serie)
+
+    # ..pd.factorize corta en el carácter NUL los textos que no usan pyarrow
+    if getattr(serie.dtype, 'storage', None) != 'pyarrow' and SEPARADOR in ''.join(serie.dropna()):
+        return traducir(como_texto(serie))
+
+    codigos, unicos = pd.factorize(serie)
+    unicos = como_texto(pd.Series(unicos))
+
+    if cache is None:
+        normalizados = traducir(unicos)
+    else:
+        cache.celdas += len(serie)
+        cache.unicos += len(unicos)
+        if len(unicos) > len(serie) * UMBRAL_UNICOS:
+            normalizados = traducir(unicos)
+        else:
+            normalizados = cache.normalizar(unicos, traducir, nombre)
+
+    # ..el código -1 (celda nula) toma el "" agregado al final
+    valores = np.append(normalizados.to_numpy(dtype=object), '')
+    return pd.Series(valores[codigos], index=serie.index, dtype=object)
+
+#...................................................... | PERFILES DE NORMALIZACIÓN
+def funcion_paso(paso, argumentos):
+    """Función texto -> texto de un paso carácter a carácter"""
+    if paso == 'quitar':
+        (caracteres,) = argumentos
+        borrar = dict.fromkeys(map(ord, caracteres))
+        return lambda texto: texto.translate(borrar)
+    if paso == 'transliterar':
+        return transliterar
+    if paso == 'filtrar':
+        # ..una clase de caracteres a eliminar; así el filtro actúa carácter a carácter
+        (patron,) = argumentos
+        if not re.fullmatch(r'\[.+\]', patron):
+            raise ValueError(f"filtrar espera una clase de caracteres [...], no {patron!r}")
+        regex = re.compile(patron)
+        return lambda texto: regex.sub('', texto)
+    if paso == 'mayusculas':
+        return str.upper
+    raise ValueError(f"Paso de normalización desconocido: {paso!r}")
+
+class Perfil:
+    """
+    Normalización declarada como lista ordenada de pasos (tuplas paso, argumentos):
+    - ('recortar',)                                   -> texto.strip()
+    - ('quitar', caracteres)                          -> elimina esos caracteres
+    - ('unificar_separadores', patron, reemplazo)     -> re.sub(patron, reemplazo, texto)
+    - ('transliterar',)                               -> transliterar(texto) (= unidecode)
+    - ('filtrar', clase)                              -> re.sub(clase, '', texto)
+    - ('mayusculas',)                                 -> texto.upper()
+    Se compila al crearlo; normalizar_texto aplica los pasos tal cual y sirve de referencia.
+    """
+
+    def __init__(self, nombre, script, pasos):
+        self.nombre = nombre
+        self.script = script
+        self.pasos = [tuple(paso) for paso in pasos]
+        self.etapas = self.compilar()
+
+    def compilar(self):
+        """Agrupa los pasos en etapas: RECORTAR (por celda) o EtapaUnida (columna unida)"""
+        etapas = []
+        traductores = []
+        funciones = []
+
+        def cerrar_tabla():
+            if funciones:
+                traductores.append(TablaCaracteres(list(funciones)))
+                funciones.clear()
+
+        for paso, *argumentos in self.pasos:
+            if paso in PASOS_CARACTER:
+                funciones.append(funcion_paso(paso, argumentos))
+                continue
+            cerrar_tabla()
+            if paso == 'unificar_separadores':
+                traductores.append(UnificadorSeparadores(*argumentos))
+            elif paso == RECORTAR:
+                if traductores:
+                    etapas.append(EtapaUnida(list(traductores)))
+                    traductores.clear()
+                etapas.append(RECORTAR)
+            else:
+                raise ValueError(f"Paso de normalización desconocido: {paso!r}")
+        cerrar_tabla()
+        if traductores:
+            etapas.append(EtapaUnida(traductores))
+        return etapas
+
+    def normalizar_texto(self, texto):
+        """Versión celda a celda sin compilar, igual que normalizar_texto de los scripts"""
+        if pd.isna(texto):
+            return ""
+        texto = str(texto)
+        for paso, *argumentos in self.pasos:
+            if paso == RECORTAR:
+                texto = texto.strip()
+            elif paso == 'unificar_separadores':
+                patron, reemplazo = argumentos
+                texto = re.sub(patron, reemplazo, texto)
+            else:
+                texto = funcion_paso(paso, argumentos)(texto)
+        return texto
+
+    def traducir(self, texto):
+        """Aplica las etapas compiladas a una columna de textos sin nulos"""
+        for etapa in self.etapas:
+            if etapa == RECORTAR:
+                texto = texto.str.strip()
+            else:
+                texto = aplicar_unido(texto, etapa.traducir, etapa.traducir_celda)
+        return texto
+
+    def normalizar_serie(self, serie, cache=None):
+        """Normaliza una columna; las celdas nulas quedan como texto vacío"""
+        return normalizar_unicos(serie, self.traducir, self.nombre, cache)
+
+PERFILES = {perfil.nombre: perfil for perfil in (
+    # ..quita puntos, comas, acentos y caracteres especiales
+    Perfil('basico', 'normalizadorhdc.py', [
+        ('quitar', '.,'),
+        ('transliterar',),
+        ('filtrar', r'[^a-zA-Z0-9\s]'),
+        ('recortar',),
+    ]),
+    # ..quita comillas, unifica separadores, quita acentos y pasa a mayúsculas;
+    # ..mayúsculas antes del último recortar da lo mismo y queda en la misma tabla
+    Perfil('universal', 'normalizador.py', [
+        ('recortar',),
+        ('quitar', '"\''),
+        ('unificar_separadores', r'[\s,;]+', ' '),
+        ('quitar', '.'),
+        ('transliterar',),
+        ('filtrar', r'[^a-zA-Z0-9\s_-]'),
+        ('mayusculas',),
+        ('recortar',),
+    ]),
+    # ..quita acentos y puntuación y pasa a mayúsculas
+    Perfil('final', 'normalizadorfinal.py', [
+        ('recortar',),
+        ('transliterar',),
+        ('filtrar', r'[^\w\s]'),
+        ('mayusculas',),
+    ]),
+)}
+
+#...................................................... | NORMALIZADORES POR VARIANTE
+def normalizar_serie_basico(serie, cache=None):
+    """Quita puntos, comas, acentos y caracteres especiales (normalizadorhdc.py)"""
+    return PERFILES['basico'].normalizar_serie(serie, cache)
+
+def normalizar_serie_universal(serie, cache=None):
+    """Quita comillas, unifica separadores, quita acentos y pasa a mayúsculas (normalizador.py)"""
+    return PERFILES['universal'].normalizar_serie(serie, cache)
+
+def normalizar_serie_final(serie, cache=None):
+    """Quita acentos y puntuación y pasa a mayúsculas (normalizadorfinal.py)"""
+    return PERFILES['final'].normalizar_serie(serie, cache)
+
+#...................................................... | NORMALIZACIÓN POR TABLA
+def normalizar_encabezados_basico(df):
+    """Normaliza los nombres de columnas igual que el contenido (normalizadorhdc.py)"""
+    df.columns = normalizar_serie_basico(pd.Series(df.columns, dtype=object)).tolist()
+    return df
+
+def normalizar_encabezados_universal(df):
+    """Normaliza los nombres de columnas igual que el contenido (normalizador.py)"""
+    df.columns = normalizar_serie_universal(pd.Series(df.columns, dtype=object)).tolist()
+    return df
+
+def normalizar_datos_basico(df, cache=None):
+    """Normaliza todas las columnas de texto de un DataFrame (normalizadorhdc.py)"""
+    for columna in df.columns:
+        with instrumentacion.etapa('columna', columna=str(columna), filas=len(df)):
+            df[columna] = normalizar_serie_basico(df[columna], cache)
+    return df
+
+def normalizar_datos_universal(df, cache=None):
+    """Normaliza todas las columnas de texto de un DataFrame (normalizador.py)"""
+    for columna in df.columns:
+        with instrumentacion.etapa('columna', columna=str(columna), filas=len(df)):
+            df[columna] = normalizar_serie_universal(df[columna], cache)
+    return df
+
+#...................................................... | FUNCION MAIN
+def main():
+    diferencias = verificar_transliteracion()
+    for texto, obtenido, esperado in diferencias:
+        print(f"{texto!r}: transliterar={obtenido!r} unidecode={esperado!r}")
+    print(f"Tabla de transliteración: {len(TABLA_TRANSLITERACION)} caracteres, "
+          f"{len(diferencias)} diferencias con unidecode")
+    return 1 if diferencias else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
+#...................................................... | END
@@ -7,14 +7,17 @@
 #...................................................... | STACK DE LIBRERÍAS
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import pandas as pd
-import unidecode
-import re
 from pathlib import Path
 import sys
 import os #para abrir path
-import chardet
 import csv
+import multiprocessing
+import motor
+import deteccion
+import entrada
+import normalizacion
+import segundo_plano
+import variantes
 
 #...................................................... | CLASE PRINCIPAL
 class NormalizadorApp:
@@ -29,6 +32,18 @@ class NormalizadorApp:
         self.archivo_salida = tk.StringVar()
         self.encoding_detectado = tk.StringVar(value="No detectado")
         self.delimiter_detectado = tk.StringVar(value="No detectado")
+        self.comillas_detectadas = motor.COMILLAS
+        self.procesar_por_bloques = tk.BooleanVar(value=False)
+        # ..caché de valores normalizados, compartida entre columnas y archivos
+        self.cache = normalizacion.CacheNormalizacion()
+        # ..procesos para normalizar columnas en paralelo (1 = sin paralelismo)
+        self.trabajadores = tk.IntVar(value=1)
+        # ..lector CSV multihilo de pyarrow (si el archivo no es compatible se usa el de pandas)
+        self.usar_pyarrow = tk.BooleanVar(value=False)
+        # ..normalizar todas las hojas de un Excel (por defecto sólo la primera)
+        self.todas_las_hojas = tk.BooleanVar(value=False)
+        # ..la normalización corre en un hilo aparte para no congelar la ventana
+        self.tarea = segundo_plano.TareaSegundoPlano(self.root, self.recibir_mensaje)
         
         self.crear_interfaz()
 
@@ -104,12 +119,44 @@ class NormalizadorApp:
                   fg='white',
                   font=('Arial', 11)).pack(side='left', padx=5)
 
-        tk.Button(proceso_frame,
-                  text="Normalizar Archivo",
-                  command=self.procesar_archivo,
-                  bg='#2196F3',
-                  fg='white',
-                  font=('Arial', 11, 'bold')).pack(side='left', padx=5)
+        self.boton_normalizar = tk.Button(proceso_frame,
+                                          text="Normalizar Archivo",
+                                          command=self.procesar_archivo,
+                                          bg='#2196F3',
+                                          fg='white',
+                                          font=('Arial', 11, 'bold'))
+        self.boton_normalizar.pack(side='left', padx=5)
+
+        self.boton_cancelar = tk.Button(proceso_frame,
+                                        text="Cancelar",
+                                        command=self.cancelar_proceso,
+                                        state=tk.DISABLED,
+                                        font=('Arial', 11))
+        self.boton_cancelar.pack(side='left', padx=5)
+
+        # ..modo por bloques para archivos grandes
+        tk.Checkbutton(proceso_frame,
+                       text="Procesar por bloques (archivos grandes)",
+                       variable=self.procesar_por_bloques,
+                       bg='#f0f0f0').pack(side='left', padx=5)
+
+        # ..procesos en paralelo
+        tk.Label(proceso_frame,
+                 text="Procesos:",
+                 bg='#f0f0f0').pack(side='left', padx=(10, 0))
+        tk.Spinbox(proceso_frame,
+                   from_=1,
+                   to=motor.TRABAJADORES,
+                   textvariable=self.trabajadores,
+                   width=4).pack(side='left', padx=5)
+        tk.Checkbutton(proceso_frame,
+                       text="Lector pyarrow",
+                       variable=self.usar_pyarrow,
+                       bg='#f0f0f0').pack(side='left', padx=5)
+        tk.Checkbutton(proceso_frame,
+                       text="Todas las hojas",
+                       variable=self.todas_las_hojas,
+                       bg='#f0f0f0').pack(side='left', padx=5)
 
         # ..barra de progreso
         self.progress_var = tk.DoubleVar()
@@ -135,20 +182,20 @@ class NormalizadorApp:
         firma_label.pack(side=tk.RIGHT)
 
     def detectar_encoding(self, archivo):
-        with open(archivo, 'rb') as file:
-            raw_data = file.read()
-            result = chardet.detect(raw_data)
-            return result['encoding']
+        # ..sólo lee muestras acotadas del inicio, medio y final del archivo
+        encoding, motivo = deteccion.detectar_encoding(archivo)
+        self.log(f"Criterio de encoding: {motivo}")
+        return encoding
 
     def detectar_delimiter(self, archivo, encoding):
-        sniffer = csv.Sniffer()
-        with open(archivo, 'r', encoding=encoding) as file:
-            sample = file.read(4096)
-            try:
-                dialect = sniffer.sniff(sample)
-                return dialect.delimiter
-            except:
-                return None
+        # ..puntúa cada delimitador candidato con líneas de varias partes del archivo
+        dialecto = deteccion.detectar_dialecto(archivo, encoding)
+        self.log(f"Dialecto: {dialecto.descripcion()}")
+        if dialecto.confianza < deteccion.CONFIANZA_DIALECTO:
+            otros = ', '.join(f"{candidato!r} ({puntaje:.0%})" for candidato, puntaje in dialecto.candidatos[1:])
+            self.log(f"Delimitador poco seguro; otros candidatos: {otros}")
+        self.comillas_detectadas = dialecto.comillas
+        return dialecto.delimitador if dialecto.confianza else None
 
     def analizar_archivo(self):
         try:
@@ -157,17 +204,20 @@ class NormalizadorApp:
                 raise ValueError("Seleccione un archivo primero")
 
             self.log("Analizando archivo...")
-            
-            # ..detectar encoding
-            encoding = self.detectar_encoding(archivo)
-            self.encoding_detectado.set(encoding or "No detectado")
-            self.log(f"Encoding detectado: {encoding}")
 
-            # ..detectar delimiter si es CSV
-            if archivo.endswith('.csv'):
-                delimiter = self.detectar_delimiter(archivo, encoding)
-                self.delimiter_detectado.set(delimiter or "No detectado")
-                self.log(f"Delimitador detectado: {delimiter}")
+            if motor.es_csv(archivo):
+                # ..el CSV se mapea sólo mientras dura el análisis
+                with entrada.ArchivoMapeado(archivo) as mapeado:
+                    encoding = self.detectar_encoding(mapeado)
+                    self.encoding_detectado.set(encoding or "No detectado")
+                    self.log(f"Encoding detectado: {encoding}")
+
+                    delimiter = self.detectar_delimiter(mapeado, encoding)
+                    self.delimiter_detectado.set(delimiter or "No detectado")
+                    self.log(f"Delimitador detectado: {delimiter}")
+            else:
+                # ..un Excel no tiene encoding ni delimitador
+                self.encoding_detectado.set("No aplica (Excel)")
 
             self.log("Análisis completado")
             
@@ -175,106 +225,126 @@ class NormalizadorApp:
             self.log(f"Error en análisis: {str(e)}")
             messagebox.showerror("Error", f"Error en análisis: {str(e)}")
 
-    def normalizar_texto(self, texto):
-        try:
-            if pd.isna(texto):
-                return ""
-            
-            texto = str(texto).strip()
-            
-            # ..reemplazar caracteres problemáticos
-            texto = texto.replace('"', '')
-            texto = texto.replace("'", "")
-            
-            # ..normalizar espacios y puntuación
-            texto = re.sub(r'[\s,;]+', ' ', texto)
-            texto = texto.replace('.', '')
-            
-            # ..quitar acentos
-            texto = unidecode.unidecode(texto)
-            
-            # ..eliminar caracteres especiales
-            texto = re.sub(r'[^a-zA-Z0-9\s_-]', '', texto)
-            
-            return texto.strip().upper()
-        except Exception as e:
-            self.log(f"Error normalizando texto: {str(e)}")
-            return str(texto)
-
     def procesar_archivo(self):
         try:
             if not self.archivo_entrada.get() or not self.archivo_salida.get():
                 raise ValueError("Debe seleccionar archivos de entrada y salida")
+            if self.tarea.en_curso():
+                return
 
             self.log("Iniciando normalización...")
             self.progress_var.set(0)
-            
-            # ..detectar encoding si no se ha hecho
+            self.cache.reiniciar_estadisticas()
+
+            # ..detectar encoding si no se ha hecho (en el hilo de la interfaz)
             if self.encoding_detectado.get() == "No detectado":
                 self.analizar_archivo()
 
+            # ..las variables de Tkinter sólo se leen desde el hilo de la interfaz
+            entrada = self.archivo_entrada.get()
+            salida = self.archivo_salida.get()
             encoding = self.encoding_detectado.get()
-            
-            # ..leer archivo
-            if self.archivo_entrada.get().endswith('.csv'):
-                delimiter = self.delimiter_detectado.get()
-                if delimiter == "No detectado":
-                    delimiter = ','
-                
-                df = pd.read_csv(
-                    self.archivo_entrada.get(),
+            delimiter = self.delimiter_detectado.get()
+            if delimiter == "No detectado":
+                delimiter = ','
+            comillas = self.comillas_detectadas
+            trabajadores = self.trabajadores.get()
+            lector = 'pyarrow' if self.usar_pyarrow.get() else 'c'
+            # ..con varias hojas cada hoja se normaliza completa y en paralelo con las demás
+            todas_las_hojas = self.todas_las_hojas.get() and not motor.es_csv(entrada)
+            if todas_las_hojas:
+                self.log("Normalizando todas las hojas del libro...")
+
+            # ..por bloques: la memoria queda acotada por el tamaño del bloque
+            tamano_bloque = None
+            if self.procesar_por_bloques.get() and not todas_las_hojas and motor.admite_bloques(entrada, salida):
+                tamano_bloque = motor.TAMANO_BLOQUE
+                self.log(f"Procesando por bloques de {tamano_bloque} filas...")
+            if trabajadores > 1:
+                self.log(f"Normalizando columnas con {trabajadores} procesos")
+
+            self.boton_normalizar.config(state=tk.DISABLED)
+            self.boton_cancelar.config(state=tk.NORMAL)
+        except Exception as e:
+            self.log(f"Error: {str(e)}")
+            messagebox.showerror("Error", f"Error al procesar archivo: {str(e)}")
+            return
+
+        def normalizar():
+            # ..el pool de procesos se reutiliza en todos los bloques; el CSV queda mapeado hasta terminar
+            with motor.crear_ejecutor(trabajadores) as ejecutor, motor.mapear_csv(entrada) as archivo:
+                if todas_las_hojas:
+                    motor.normalizar_libro(
+                        entrada,
+                        salida,
+                        variantes.VARIANTES['universal'],
+                        ejecutor=ejecutor,
+                        cache=self.cache,
+                        al_avanzar=lambda fraccion, mensaje: self.tarea.enviar('avance', fraccion, mensaje),
+                        cancelar=self.tarea.cancelar
+                    )
+                    return
+                motor.normalizar_archivo(
+                    archivo,
+                    salida,
+                    variantes.VARIANTES['universal'],
                     encoding=encoding,
-                    delimiter=delimiter,
-                    on_bad_lines='skip',
-                    low_memory=False
-                )
-            else:
-                df = pd.read_excel(self.archivo_entrada.get())
-
-            self.progress_var.set(20)
-            self.log("Archivo leído correctamente")
-
-            # ..normalizar nombres de columnas
-            df.columns = [self.normalizar_texto(col) for col in df.columns]
-            self.progress_var.set(40)
-            self.log("Nombres de columnas normalizados")
-
-            # ..normalizar contenido
-            total_columns = len(df.columns)
-            for idx, columna in enumerate(df.columns):
-                df[columna] = df[columna].apply(self.normalizar_texto)
-                progress = 40 + (40 * (idx + 1) / total_columns)
-                self.progress_var.set(progress)
-                self.log(f"Columna {idx+1}/{total_columns} normalizada: {columna}")
-
-            # ..guardar archivo
-            if self.archivo_salida.get().endswith('.csv'):
-                df.to_csv(
-                    self.archivo_salida.get(),
-                    index=False,
-                    encoding='utf-8',
-                    sep=',',
-                    quoting=csv.QUOTE_MINIMAL
+                    delimitador=delimiter,
+                    tamano_bloque=tamano_bloque,
+                    ejecutor=ejecutor,
+                    trabajadores=trabajadores,
+                    cache=self.cache,
+                    al_avanzar=lambda fraccion, mensaje: self.tarea.enviar('avance', fraccion, mensaje),
+                    cancelar=self.tarea.cancelar,
+                    lector=lector,
+                    comillas=comillas
                 )
-            else:
-                df.to_excel(
-                    self.archivo_salida.get(),
-                    index=False,
-                    engine='openpyxl'
-                )
-
+            if not ejecutor:
+                self.log(self.cache.resumen())
+
+        self.tarea.iniciar(normalizar)
+
+    def cancelar_proceso(self):
+        if self.tarea.en_curso():
+            self.tarea.cancelar.set()
+            self.boton_cancelar.config(state=tk.DISABLED)
+            self.log("Cancelando... se detendrá al terminar el bloque o columna en curso")
+
+    def recibir_mensaje(self, tipo, *datos):
+        # ..mensajes del hilo de normalización, atendidos en el hilo de la interfaz
+        if tipo == 'log':
+            self.log(*datos)
+        elif tipo == 'avance':
+            fraccion, mensaje = datos
+            self.progress_var.set(fraccion * 100)
+            self.log(mensaje)
+        elif tipo == 'fin':
+            self.terminar_proceso()
             self.progress_var.set(100)
             self.log("¡Normalización completada exitosamente!")
             messagebox.showinfo("Éxito", "Archivo normalizado correctamente")
+        elif tipo == 'cancelado':
+            self.terminar_proceso()
+            self.progress_var.set(0)
+            self.log("Normalización cancelada; no se guardó el archivo de salida")
+            messagebox.showwarning("Cancelado", "La normalización fue cancelada")
+        elif tipo == 'error':
+            self.terminar_proceso()
+            self.log(f"Error: {str(datos[0])}")
+            messagebox.showerror("Error", f"Error al procesar archivo: {str(datos[0])}")
 
-        except Exception as e:
-            self.log(f"Error: {str(e)}")
-            messagebox.showerror("Error", f"Error al procesar archivo: {str(e)}")
+    def terminar_proceso(self):
+        self.boton_normalizar.config(state=tk.NORMAL)
+        self.boton_cancelar.config(state=tk.DISABLED)
 
     def log(self, mensaje):
+        # ..desde el hilo de normalización el mensaje pasa por la cola
+        if self.tarea.en_hilo_de_trabajo():
+            self.tarea.enviar('log', mensaje)
+            return
         self.log_text.insert(tk.END, f"{mensaje}\n")
         self.log_text.see(tk.END)
-        self.root.update()
+        self.root.update_idletasks()
 
     def seleccionar_archivo_entrada(self):
         filetypes = [
@@ -290,11 +360,14 @@ class NormalizadorApp:
             self.archivo_salida.set(str(Path(path.parent) / nuevo_nombre))
             self.encoding_detectado.set("No detectado")
             self.delimiter_detectado.set("No detectado")
+            self.comillas_detectadas = motor.COMILLAS
 
     def seleccionar_archivo_salida(self):
         filetypes = [
             ('Archivos CSV', '*.csv'),
-            ('Archivos Excel', '*.xlsx')
+            ('Archivos Excel', '*.xlsx'),
+            ('Parquet', '*.parquet'),
+            ('Arrow / Feather', '*.arrow *.feather')
         ]
         filename = filedialog.asksaveasfilename(
             filetypes=filetypes,
@@ -304,6 +377,8 @@ class NormalizadorApp:
             self.archivo_salida.set(filename)
 #...................................................... | FUNCION MAIN
 def main():
+    # ..necesario para los procesos en paralelo en el ejecutable
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = NormalizadorApp(root)
     root.mainloop()
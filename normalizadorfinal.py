@@ -14,19 +14,23 @@ Características:
 #...................................................... | STACK DE LIBRERÍAS
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, font
-import pandas as pd
 import numpy as np
-import unidecode
-import re
 from pathlib import Path
 import sys
 import os
-import chardet
-import csv
 from datetime import datetime
 import locale
 import logging
-from decimal import Decimal
+import multiprocessing
+import motor
+import deteccion
+import incremental
+import instrumentacion
+import normalizacion
+import segundo_plano
+import procesador
+import variantes
+import vista_previa
 
 class EstilosApp:
     """Clase para manejar los estilos de la aplicación"""
@@ -48,87 +52,6 @@ class EstilosApp:
         'pequeño': ('Helvetica', 8)
     }
 
-class ProcesadorDatos:
-    """Clase para el procesamiento de datos"""
-    
-    @staticmethod
-    def es_fecha(texto):
-        patrones_fecha = [
-            r'\d{2}/\d{2}/\d{4}',
-            r'\d{2}-\d{2}-\d{4}',
-            r'\d{2}\.\d{2}\.\d{4}',
-            r'\d{4}/\d{2}/\d{2}',
-            r'\d{4}-\d{2}-\d{2}',
-            r'\d{2}/\d{2}/\d{2}',
-        ]
-        return any(re.match(pattern, str(texto)) for pattern in patrones_fecha)
-
-    @staticmethod
-    def normalizar_fecha(texto):
-        try:
-            if pd.isna(texto):
-                return None
-                
-            # Eliminar espacios y caracteres no deseados
-            texto = str(texto).strip()
-            
-            # Intentar diferentes formatos de fecha
-            formatos = ['%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d.%m.%Y', '%d/%m/%y']
-            
-            for formato in formatos:
-                try:
-                    fecha = datetime.strptime(texto, formato)
-                    return fecha.strftime('%Y-%m-%d')
-                except ValueError:
-                    continue
-                    
-            return texto
-        except Exception:
-            return texto
-
-    @staticmethod
-    def procesar_valor_monetario(texto):
-        """
-        Procesa un valor monetario y devuelve el monto como número.
-        Ejemplo: "$ 13.843 : 4,00 hrs" -> 13843.0
-        """
-        try:
-            if pd.isna(texto) or texto == '' or texto.upper() == 'NO TIENE':
-                return 0.0
-
-            # Buscar el monto hasta el primer espacio (ej: "$ 13.843")
-            match = re.search(r'\$?\s?(\d+[\d\.,]*)', str(texto))
-            if match:
-                monto = match.group(1).replace('.', '').replace(',', '.')
-                return float(Decimal(monto))
-            return 0.0
-        except Exception:
-            return 0.0
-
-    @staticmethod
-    def procesar_horas(texto):
-        """
-        Procesa las horas y devuelve el valor como número.
-        Ejemplo: "$ 13.843 : 4,00 hrs" -> 4.0
-        """
-        try:
-            if pd.isna(texto) or texto == '' or texto.upper() == 'NO TIENE':
-                return 0.0
-
-            # Buscar el patrón de horas (ej: "4,00 hrs")
-            match = re.search(r'(\d+[\.,]\d+|\d+)\s*hrs?', str(texto))
-            if match:
-                horas = match.group(1).replace(',', '.')
-                return float(Decimal(horas))
-            return 0.0
-        except Exception:
-            return 0.0
-
-    @staticmethod
-    def es_columna_monetaria(nombre_columna):
-        palabras_clave = ['MONTO', 'VALOR', 'PRECIO', 'EXTRAORDINARIA', 'PAGO']
-        return any(palabra in nombre_columna.upper() for palabra in palabras_clave)
-
 class NormalizadorApp:
     def __init__(self, root):
         self.root = root
@@ -141,7 +64,30 @@ class NormalizadorApp:
         self.archivo_salida = tk.StringVar()
         self.encoding_detectado = tk.StringVar(value="No detectado")
         self.delimiter_detectado = tk.StringVar(value="No detectado")
+        self.clases_detectadas = tk.StringVar(value="No detectado")
+        self.estimacion = tk.StringVar(value="No detectado")
+        self.comillas_detectadas = motor.COMILLAS
         self.progreso = tk.DoubleVar()
+        self.procesar_por_bloques = tk.BooleanVar(value=False)
+        self.tamano_bloque = tk.IntVar(value=motor.TAMANO_BLOQUE)
+
+        # Caché de valores normalizados, compartida entre columnas y archivos
+        self.cache = normalizacion.CacheNormalizacion()
+
+        # Procesos para normalizar columnas en paralelo (1 = sin paralelismo)
+        self.trabajadores = tk.IntVar(value=1)
+
+        # Lector CSV multihilo de pyarrow (si el archivo no es compatible se usa el de pandas)
+        self.usar_pyarrow = tk.BooleanVar(value=False)
+
+        # Normalizar todas las hojas de un Excel (por defecto sólo la primera)
+        self.todas_las_hojas = tk.BooleanVar(value=False)
+
+        # Reutilizar las filas ya normalizadas en la corrida anterior y escribir el delta
+        self.incremental = tk.BooleanVar(value=False)
+
+        # La normalización corre en un hilo aparte para no congelar la ventana
+        self.tarea = segundo_plano.TareaSegundoPlano(self.root, self.recibir_mensaje)
         
         # Configurar logging
         self.configurar_logging()
@@ -159,6 +105,8 @@ class NormalizadorApp:
             ]
         )
         self.logger = logging.getLogger(__name__)
+        # Tiempos, filas, bytes y memoria de cada etapa, como líneas JSON en el mismo log
+        instrumentacion.configurar('normalizador.log')
 
     def crear_interfaz(self):
         # Frame principal con padding
@@ -174,6 +122,9 @@ class NormalizadorApp:
         # Sección de información
         self.crear_seccion_info()
         
+        # Primeras filas ya normalizadas
+        self.crear_seccion_vista_previa()
+        
         # Sección de controles
         self.crear_seccion_controles()
         
@@ -238,6 +189,31 @@ class NormalizadorApp:
         ttk.Label(frame_delimiter, text="Delimitador detectado:", width=20).pack(side=tk.LEFT)
         ttk.Label(frame_delimiter, textvariable=self.delimiter_detectado, foreground="#0078D7").pack(side=tk.LEFT)
 
+        # Clasificación de columnas (numérica, fecha, monetaria, categórica, texto)
+        frame_clases = ttk.Frame(frame_info)
+        frame_clases.pack(fill=tk.X)
+        ttk.Label(frame_clases, text="Columnas:", width=20).pack(side=tk.LEFT)
+        ttk.Label(frame_clases, textvariable=self.clases_detectadas, foreground="#0078D7").pack(side=tk.LEFT)
+
+        # Filas, memoria y tiempo estimados a partir de una muestra
+        frame_estimacion = ttk.Frame(frame_info)
+        frame_estimacion.pack(fill=tk.X)
+        ttk.Label(frame_estimacion, text="Estimación:", width=20).pack(side=tk.LEFT)
+        ttk.Label(frame_estimacion, textvariable=self.estimacion, foreground="#0078D7").pack(side=tk.LEFT)
+
+    def crear_seccion_vista_previa(self):
+        """Crea la tabla con las primeras filas del archivo ya normalizadas"""
+        frame_vista = ttk.LabelFrame(self.main_frame, text="Vista previa normalizada", padding="10")
+        frame_vista.pack(fill=tk.X, pady=(0, 10))
+
+        self.tabla_vista = ttk.Treeview(frame_vista, show='headings', height=vista_previa.FILAS_VISTA)
+        self.tabla_vista.pack(fill=tk.X)
+
+        # Scrollbar horizontal para tablas con muchas columnas
+        scrollbar = ttk.Scrollbar(frame_vista, orient=tk.HORIZONTAL, command=self.tabla_vista.xview)
+        scrollbar.pack(fill=tk.X)
+        self.tabla_vista.config(xscrollcommand=scrollbar.set)
+
     def crear_seccion_controles(self):
         """Crea la sección de controles de proceso"""
         frame_controles = ttk.Frame(self.main_frame)
@@ -252,12 +228,69 @@ class NormalizadorApp:
         ).pack(side=tk.LEFT, padx=(0, 5))
 
         # Botón para normalizar archivo
-        ttk.Button(
+        self.boton_normalizar = ttk.Button(
             frame_controles,
             text="Normalizar Archivo",
             command=self.procesar_archivo,
             style="Accent.TButton"
-        ).pack(side=tk.LEFT)
+        )
+        self.boton_normalizar.pack(side=tk.LEFT)
+
+        # Botón para cancelar la normalización en curso
+        self.boton_cancelar = ttk.Button(
+            frame_controles,
+            text="Cancelar",
+            command=self.cancelar_proceso,
+            state=tk.DISABLED
+        )
+        self.boton_cancelar.pack(side=tk.LEFT, padx=(5, 0))
+
+        # Modo por bloques para archivos que no caben en memoria
+        ttk.Checkbutton(
+            frame_controles,
+            text="Procesar por bloques",
+            variable=self.procesar_por_bloques
+        ).pack(side=tk.LEFT, padx=(15, 5))
+        ttk.Label(frame_controles, text="Filas por bloque:").pack(side=tk.LEFT)
+        ttk.Spinbox(
+            frame_controles,
+            from_=1000,
+            to=5_000_000,
+            increment=10_000,
+            textvariable=self.tamano_bloque,
+            width=10
+        ).pack(side=tk.LEFT, padx=(5, 0))
+
+        # Procesos en paralelo
+        ttk.Label(frame_controles, text="Procesos:").pack(side=tk.LEFT, padx=(15, 0))
+        ttk.Spinbox(
+            frame_controles,
+            from_=1,
+            to=motor.TRABAJADORES,
+            textvariable=self.trabajadores,
+            width=4
+        ).pack(side=tk.LEFT, padx=(5, 0))
+
+        # Lector pyarrow
+        ttk.Checkbutton(
+            frame_controles,
+            text="Lector pyarrow",
+            variable=self.usar_pyarrow
+        ).pack(side=tk.LEFT, padx=(15, 0))
+
+        # Todas las hojas de un Excel
+        ttk.Checkbutton(
+            frame_controles,
+            text="Todas las hojas",
+            variable=self.todas_las_hojas
+        ).pack(side=tk.LEFT, padx=(15, 0))
+
+        # Sólo filas nuevas o modificadas desde la corrida anterior
+        ttk.Checkbutton(
+            frame_controles,
+            text="Incremental",
+            variable=self.incremental
+        ).pack(side=tk.LEFT, padx=(15, 0))
 
     def crear_barra_progreso(self):
         """Crea la barra de progreso"""
@@ -313,38 +346,46 @@ class NormalizadorApp:
             self.archivo_salida.set(str(Path(path.parent) / nuevo_nombre))
             self.encoding_detectado.set("No detectado")
             self.delimiter_detectado.set("No detectado")
+            self.clases_detectadas.set("No detectado")
+            self.estimacion.set("No detectado")
+            self.comillas_detectadas = motor.COMILLAS
 
     def seleccionar_archivo_salida(self):
         """Abre un diálogo para seleccionar el archivo de salida"""
         filetypes = [
             ('Archivos CSV', '*.csv'),
-            ('Archivos Excel', '*.xlsx *.xls')
+            ('Archivos Excel', '*.xlsx *.xls'),
+            ('Parquet', '*.parquet'),
+            ('Arrow / Feather', '*.arrow *.feather')
         ]
         filename = filedialog.asksaveasfilename(filetypes=filetypes, defaultextension=".csv")
         if filename:
             self.archivo_salida.set(filename)
 
-    def detectar_encoding(self):
-        """Detecta el encoding del archivo"""
+    def detectar_encoding(self, archivo):
+        """Detecta el encoding del archivo CSV (ruta o entrada.ArchivoMapeado)"""
         try:
-            with open(self.archivo_entrada.get(), 'rb') as file:
-                raw_data = file.read()
-                result = chardet.detect(raw_data)
-                encoding = result['encoding']
-                self.encoding_detectado.set(encoding)
-                self.log(f"Encoding detectado: {encoding}")
+            # Sólo se leen muestras acotadas del inicio, medio y final del archivo
+            with instrumentacion.etapa('deteccion_encoding', archivo=Path(archivo).name):
+                encoding, motivo = deteccion.detectar_encoding(archivo)
+            self.encoding_detectado.set(encoding)
+            self.log(f"Encoding detectado: {encoding} ({motivo})")
         except Exception as e:
             self.log(f"Error detectando encoding: {str(e)}", error=True)
             self.encoding_detectado.set("Error")
 
-    def detectar_delimitador(self):
-        """Detecta el delimitador del archivo CSV"""
+    def detectar_delimitador(self, archivo):
+        """Detecta el delimitador y las comillas del archivo CSV (ruta o entrada.ArchivoMapeado)"""
         try:
-            with open(self.archivo_entrada.get(), 'r', encoding=self.encoding_detectado.get()) as file:
-                sample = file.read(4096)
-                dialect = csv.Sniffer().sniff(sample)
-                self.delimiter_detectado.set(dialect.delimiter)
-                self.log(f"Delimitador detectado: {dialect.delimiter}")
+            # Se puntúa cada delimitador candidato con líneas de varias partes del archivo
+            with instrumentacion.etapa('deteccion_dialecto', archivo=Path(archivo).name):
+                dialecto = deteccion.detectar_dialecto(archivo, self.encoding_detectado.get())
+            self.delimiter_detectado.set(dialecto.delimitador)
+            self.comillas_detectadas = dialecto.comillas
+            self.log(f"Dialecto detectado: {dialecto.descripcion()}")
+            if dialecto.confianza < deteccion.CONFIANZA_DIALECTO:
+                otros = ', '.join(f"{candidato!r} ({puntaje:.0%})" for candidato, puntaje in dialecto.candidatos[1:])
+                self.log(f"Delimitador poco seguro; otros candidatos: {otros}", error=True)
         except Exception as e:
             self.log(f"Error detectando delimitador: {str(e)}", error=True)
             self.delimiter_detectado.set("Error")
@@ -358,22 +399,29 @@ class NormalizadorApp:
             self.log("Iniciando análisis del archivo...")
             self.progreso.set(0)
             
-            # Detectar encoding y delimitador
-            self.detectar_encoding()
-            self.progreso.set(33)
-            self.detectar_delimitador()
-            self.progreso.set(66)
-            
-            # Verificar lectura del archivo
-            if self.archivo_entrada.get().endswith('.csv'):
-                df = pd.read_csv(
-                    self.archivo_entrada.get(),
-                    encoding=self.encoding_detectado.get(),
-                    delimiter=self.delimiter_detectado.get(),
-                    nrows=5
+            # Un CSV se mapea sólo mientras dura el análisis; un Excel no tiene encoding ni delimitador
+            with motor.mapear_csv(self.archivo_entrada.get()) as archivo:
+                if motor.es_csv(archivo):
+                    self.detectar_encoding(archivo)
+                    self.progreso.set(33)
+                    self.detectar_delimitador(archivo)
+                else:
+                    self.encoding_detectado.set("No aplica (Excel)")
+                    self.log(f"Hojas del libro: {', '.join(motor.hojas_excel(archivo))}")
+                self.progreso.set(66)
+
+                # Estimación en tiempo acotado con muestras repartidas en el archivo (no se lee completo)
+                estimacion = vista_previa.estimar(
+                    archivo,
+                    variantes.VARIANTES['final'],
+                    self.encoding_detectado.get(),
+                    self.delimiter_detectado.get(),
+                    self.comillas_detectadas
                 )
-            else:
-                df = pd.read_excel(self.archivo_entrada.get(), nrows=5)
+            self.mostrar_clases(estimacion.clases)
+            self.estimacion.set(estimacion.descripcion())
+            self.log(f"Estimación: {estimacion.descripcion()} (muestra de {len(estimacion.muestra)} filas)")
+            self.mostrar_vista_previa(estimacion.vista)
             self.progreso.set(100)
             self.log("Archivo analizado correctamente", success=True)
         except Exception as e:
@@ -381,87 +429,176 @@ class NormalizadorApp:
             messagebox.showerror("Error", f"Error en análisis: {str(e)}")
             self.progreso.set(0)
 
+    def mostrar_clases(self, clases):
+        """Muestra la clase de cada columna, que decide cómo se normaliza"""
+        self.clases_detectadas.set(procesador.resumen_clases(clases) or "Sin columnas")
+        for clase in procesador.CLASES_COLUMNA:
+            columnas = [columna for columna, otra in clases.items() if otra == clase]
+            if columnas:
+                self.log(f"Columnas {clase}: {', '.join(columnas)}")
+        if procesador.NUMERICA in clases.values():
+            self.log("Las columnas numéricas se conservan tal cual, sin normalizar como texto")
+
+    def mostrar_vista_previa(self, df):
+        """Muestra las primeras filas normalizadas; las celdas vacías quedan en blanco"""
+        columnas = [str(columna) for columna in df.columns]
+        self.tabla_vista.delete(*self.tabla_vista.get_children())
+        self.tabla_vista.config(columns=columnas)
+        for columna in columnas:
+            self.tabla_vista.heading(columna, text=columna)
+            self.tabla_vista.column(columna, width=120, minwidth=60, stretch=False)
+        for fila in df.astype(object).where(df.notna(), '').itertuples(index=False, name=None):
+            self.tabla_vista.insert('', tk.END, values=[str(valor) for valor in fila])
+
     def procesar_archivo(self):
-        """Procesa el archivo y lo normaliza"""
+        """Valida la selección y normaliza el archivo en segundo plano"""
         try:
             if not self.archivo_entrada.get() or not self.archivo_salida.get():
                 raise ValueError("Debe seleccionar archivos de entrada y salida")
-            
+            if self.tarea.en_curso():
+                return
+
+            # Las variables de Tkinter sólo se leen desde el hilo de la interfaz
+            entrada = self.archivo_entrada.get()
+            salida = self.archivo_salida.get()
+            encoding = self.encoding_detectado.get()
+            delimitador = self.delimiter_detectado.get()
+            comillas = self.comillas_detectadas
+            trabajadores = self.trabajadores.get()
+            lector = 'pyarrow' if self.usar_pyarrow.get() else 'c'
+            # Con varias hojas cada hoja se normaliza completa y en paralelo con las demás
+            todas_las_hojas = self.todas_las_hojas.get() and not motor.es_csv(entrada)
+            usar_incremental = self.incremental.get()
+            if usar_incremental and (todas_las_hojas or not motor.es_csv(salida)):
+                self.log("El modo incremental requiere una sola hoja o CSV y salida CSV; se normalizará completo")
+                usar_incremental = False
+            tamano_bloque = None
+            if usar_incremental:
+                if self.procesar_por_bloques.get():
+                    self.log("El modo incremental procesa en memoria; no se usarán bloques")
+            elif self.procesar_por_bloques.get() and not todas_las_hojas:
+                if motor.admite_bloques(entrada, salida):
+                    tamano_bloque = self.tamano_bloque.get()
+                else:
+                    self.log("El modo por bloques requiere entrada CSV o XLSX y salida CSV, XLSX, Parquet o Arrow; se procesará en memoria")
+
             self.log("Iniciando procesamiento del archivo...")
+            if usar_incremental:
+                self.log(f"Modo incremental: sólo se normalizan filas nuevas o modificadas; el delta va a {incremental.ruta_delta(salida)}")
+            if tamano_bloque:
+                self.log(f"Procesando por bloques de {tamano_bloque} filas...")
+            if todas_las_hojas:
+                destino = "un libro con una hoja" if motor.es_excel(salida) else "un archivo"
+                self.log(f"Normalizando todas las hojas del libro ({destino} por hoja)")
+            if trabajadores > 1:
+                self.log(f"Normalizando {'hojas' if todas_las_hojas else 'columnas'} con {trabajadores} procesos en paralelo")
             self.progreso.set(0)
-            
-            # Leer el archivo
-            if self.archivo_entrada.get().endswith('.csv'):
-                df = pd.read_csv(
-                    self.archivo_entrada.get(),
-                    encoding=self.encoding_detectado.get(),
-                    delimiter=self.delimiter_detectado.get()
-                )
-            else:
-                df = pd.read_excel(self.archivo_entrada.get())
-            self.progreso.set(20)
-            self.log("Archivo leído correctamente", success=True)
-            
-            # Normalizar nombres de columnas
-            df.columns = [self.normalizar_nombre_columna(col) for col in df.columns]
-            self.progreso.set(40)
-            self.log("Nombres de columnas normalizados", success=True)
-            
-            # Normalizar datos
-            for columna in df.columns:
-                if any(palabra in columna.upper() for palabra in ['FECHA', 'DATE']):
-                    df[columna] = df[columna].apply(ProcesadorDatos.normalizar_fecha)
-                elif ProcesadorDatos.es_columna_monetaria(columna):
-                    df[f"{columna}_MONTO"] = df[columna].apply(ProcesadorDatos.procesar_valor_monetario)
-                    df[f"{columna}_HORAS"] = df[columna].apply(ProcesadorDatos.procesar_horas)
-                    df.drop(columna, axis=1, inplace=True)
-                else:
-                    df[columna] = df[columna].apply(self.normalizar_texto)
-            self.progreso.set(80)
-            self.log("Datos normalizados", success=True)
-            
-            # Guardar archivo
-            if self.archivo_salida.get().endswith('.csv'):
-                df.to_csv(self.archivo_salida.get(), index=False, encoding='utf-8')
-            else:
-                df.to_excel(self.archivo_salida.get(), index=False)
-            self.progreso.set(100)
-            self.log("Archivo guardado correctamente", success=True)
-            messagebox.showinfo("Éxito", "Archivo normalizado y guardado correctamente")
+            self.cache.reiniciar_estadisticas()
+            self.boton_normalizar.config(state=tk.DISABLED)
+            self.boton_cancelar.config(state=tk.NORMAL)
         except Exception as e:
             self.log(f"Error en procesamiento: {str(e)}", error=True)
             messagebox.showerror("Error", f"Error en procesamiento: {str(e)}")
+            return
+
+        def normalizar():
+            # El CSV queda mapeado hasta que la normalización termina o falla
+            with motor.crear_ejecutor(trabajadores) as ejecutor, motor.mapear_csv(entrada) as archivo:
+                if todas_las_hojas:
+                    hojas = motor.normalizar_libro(
+                        entrada,
+                        salida,
+                        variantes.VARIANTES['final'],
+                        ejecutor=ejecutor,
+                        cache=self.cache,
+                        al_avanzar=lambda fraccion, mensaje: self.tarea.enviar('avance', fraccion, mensaje),
+                        cancelar=self.tarea.cancelar
+                    )
+                    return sum(hojas.values())
+                if usar_incremental:
+                    resultado = incremental.normalizar_incremental(
+                        archivo,
+                        salida,
+                        variantes.VARIANTES['final'],
+                        encoding=encoding,
+                        delimitador=delimitador,
+                        ejecutor=ejecutor,
+                        trabajadores=trabajadores,
+                        cache=self.cache,
+                        al_avanzar=lambda fraccion, mensaje: self.tarea.enviar('avance', fraccion, mensaje),
+                        cancelar=self.tarea.cancelar,
+                        lector=lector,
+                        comillas=comillas,
+                        delta=True
+                    )
+                    self.log(resultado.descripcion())
+                    return resultado.filas
+                filas = motor.normalizar_archivo(
+                    archivo,
+                    salida,
+                    variantes.VARIANTES['final'],
+                    encoding=encoding,
+                    delimitador=delimitador,
+                    tamano_bloque=tamano_bloque,
+                    ejecutor=ejecutor,
+                    trabajadores=trabajadores,
+                    cache=self.cache,
+                    al_avanzar=lambda fraccion, mensaje: self.tarea.enviar('avance', fraccion, mensaje),
+                    cancelar=self.tarea.cancelar,
+                    lector=lector,
+                    comillas=comillas
+                )
+            if not ejecutor:
+                self.log(self.cache.resumen())
+            return filas
+
+        self.tarea.iniciar(normalizar)
+
+    def cancelar_proceso(self):
+        """Pide detener la normalización al terminar el bloque o columna en curso"""
+        if self.tarea.en_curso():
+            self.tarea.cancelar.set()
+            self.boton_cancelar.config(state=tk.DISABLED)
+            self.log("Cancelando... se detendrá al terminar el bloque o columna en curso")
+
+    def recibir_mensaje(self, tipo, *datos):
+        """Atiende en el hilo de la interfaz los mensajes del hilo de normalización"""
+        if tipo == 'log':
+            self.log(*datos)
+        elif tipo == 'avance':
+            fraccion, mensaje = datos
+            self.progreso.set(fraccion * 100)
+            self.log(mensaje)
+        elif tipo == 'fin':
+            self.terminar_proceso()
+            self.progreso.set(100)
+            self.log(f"Archivo guardado correctamente ({datos[0]} filas)", success=True)
+            messagebox.showinfo("Éxito", "Archivo normalizado y guardado correctamente")
+        elif tipo == 'cancelado':
+            self.terminar_proceso()
             self.progreso.set(0)
+            self.log("Normalización cancelada; no se guardó el archivo de salida", error=True)
+            messagebox.showwarning("Cancelado", "La normalización fue cancelada")
+        elif tipo == 'error':
+            self.terminar_proceso()
+            self.progreso.set(0)
+            self.log(f"Error en procesamiento: {str(datos[0])}", error=True)
+            messagebox.showerror("Error", f"Error en procesamiento: {str(datos[0])}")
 
-    # --------------------------------------------
-    # Métodos de normalización
-    # --------------------------------------------
-
-    @staticmethod
-    def normalizar_nombre_columna(nombre):
-        """Normaliza el nombre de una columna"""
-        nombre = str(nombre).strip().upper()
-        nombre = unidecode.unidecode(nombre)
-        nombre = re.sub(r'[^A-Z0-9_]', '_', nombre)
-        nombre = re.sub(r'_+', '_', nombre)
-        return nombre.strip('_')
-
-    @staticmethod
-    def normalizar_texto(texto):
-        """Normaliza un texto genérico"""
-        if pd.isna(texto):
-            return ""
-        texto = str(texto).strip()
-        texto = unidecode.unidecode(texto)
-        texto = re.sub(r'[^\w\s]', '', texto)
-        return texto.upper()
+    def terminar_proceso(self):
+        self.boton_normalizar.config(state=tk.NORMAL)
+        self.boton_cancelar.config(state=tk.DISABLED)
 
     # --------------------------------------------
     # Métodos de logging
     # --------------------------------------------
 
     def log(self, mensaje, error=False, success=False):
-        """Registra un mensaje en el log"""
+        """Registra un mensaje en el log (desde el hilo de normalización pasa por la cola)"""
+        if self.tarea.en_hilo_de_trabajo():
+            self.tarea.enviar('log', mensaje, error, success)
+            return
+
         hora_actual = datetime.now().strftime("%H:%M:%S")
         mensaje_formateado = f"[{hora_actual}] {mensaje}\n"
         
@@ -475,13 +612,16 @@ class NormalizadorApp:
             self.log_text.insert(tk.END, mensaje_formateado)
             
         self.log_text.see(tk.END)
-        self.root.update()
+        self.root.update_idletasks()
 
 # --------------------------------------------
 # Punto de entrada
 # --------------------------------------------
 
 def main():
+    # Necesario para los procesos en paralelo en el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
+
     # Configurar la interfaz gráfica
     root = tk.Tk()
     app = NormalizadorApp(root)
@@ -7,12 +7,15 @@
 #...................................................... | STACK DE LIBRERÍAS
 import tkinter as tk
 from tkinter import filedialog, messagebox,ttk
-import pandas as pd
-import unidecode
-import re
 from pathlib import Path
 import sys
 import os #para abrir path
+import deteccion
+import entrada
+import motor
+import normalizacion
+import segundo_plano
+import variantes
 
 #...................................................... | CLASE PRINCIPAL
 class NormalizadorApp:
@@ -25,6 +28,11 @@ class NormalizadorApp:
         # ..variables
         self.archivo_entrada = tk.StringVar()
         self.archivo_salida = tk.StringVar()
+        # ..caché de valores normalizados, compartida entre columnas y archivos
+        self.cache = normalizacion.CacheNormalizacion()
+        self.progreso = tk.DoubleVar()
+        # ..la normalización corre en un hilo aparte para no congelar la ventana
+        self.tarea = segundo_plano.TareaSegundoPlano(self.root, self.recibir_mensaje)
         
         self.crear_interfaz()
         
@@ -68,14 +76,31 @@ class NormalizadorApp:
                   text="Buscar",
                   command=self.seleccionar_archivo_salida).pack(side='left', padx=5)
         
-        # ..botón de proceso
-        tk.Button(main_frame,
+        # ..botones de proceso y cancelación
+        frame_botones = tk.Frame(main_frame, bg='#f0f0f0')
+        frame_botones.pack(pady=(20, 5))
+        
+        self.boton_normalizar = tk.Button(frame_botones,
                   text="Normalizar Archivo",
                   command=self.procesar_archivo,
                   bg='#4CAF50',
                   fg='white',
                   font=('Arial', 12, 'bold'),
-                  height=2).pack(pady=20)
+                  height=2)
+        self.boton_normalizar.pack(side='left', padx=5)
+        
+        self.boton_cancelar = tk.Button(frame_botones,
+                  text="Cancelar",
+                  command=self.cancelar_proceso,
+                  state=tk.DISABLED,
+                  font=('Arial', 12),
+                  height=2)
+        self.boton_cancelar.pack(side='left', padx=5)
+        
+        # ..barra de progreso
+        ttk.Progressbar(main_frame,
+                        variable=self.progreso,
+                        maximum=100).pack(fill='x', padx=5, pady=5)
         
         # ..se crea un frame para mi firmita
         firma_frame = ttk.Frame(main_frame)
@@ -116,7 +141,9 @@ class NormalizadorApp:
     def seleccionar_archivo_salida(self):
         filetypes = [
             ('Archivos CSV', '*.csv'),
-            ('Archivos Excel', '*.xlsx')
+            ('Archivos Excel', '*.xlsx'),
+            ('Parquet', '*.parquet'),
+            ('Arrow / Feather', '*.arrow *.feather')
         ]
         filename = filedialog.asksaveasfilename(filetypes=filetypes,
                                               defaultextension=".csv")
@@ -124,80 +151,84 @@ class NormalizadorApp:
             self.archivo_salida.set(filename)
             
     def log(self, mensaje):
+        # ..desde el hilo de normalización el mensaje pasa por la cola
+        if self.tarea.en_hilo_de_trabajo():
+            self.tarea.enviar('log', mensaje)
+            return
         self.log_text.insert(tk.END, mensaje + "\n")
         self.log_text.see(tk.END)
-        self.root.update()
-            
-    def normalizar_texto(self, texto):
-        try:
-            # ..convertir a string y manejar valores nulos
-            if pd.isna(texto):
-                return ""
-            texto = str(texto)
-            
-            # ..elimina puntos y comas
-            texto = texto.replace('.', '').replace(',', '')
-            
-            # ..elimina acentos y caracteres especiales
-            texto = unidecode.unidecode(texto)
-            
-            # ..elimina caracteres especiales adicionales
-            texto = re.sub(r'[^a-zA-Z0-9\s]', '', texto)
-            
-            return texto.strip()
-        except Exception as e:
-            self.log(f"Error al normalizar texto: {str(e)}")
-            return texto
+        self.root.update_idletasks()
             
     def procesar_archivo(self):
         if not self.archivo_entrada.get() or not self.archivo_salida.get():
             messagebox.showerror("Error", "Debe seleccionar archivos de entrada y salida")
             return
+        if self.tarea.en_curso():
+            return
             
-        try:
-            self.log("Iniciando proceso de normalización...")
-            
-            # ..detecta codificación y lee archivo
-            encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-            df = None
-            
-            for encoding in encodings:
-                try:
-                    if self.archivo_entrada.get().endswith('.csv'):
-                        df = pd.read_csv(self.archivo_entrada.get(), encoding=encoding)
-                    else:
-                        df = pd.read_excel(self.archivo_entrada.get())
-                    self.log(f"Archivo leído exitosamente con codificación: {encoding}")
-                    break
-                except UnicodeDecodeError:
-                    continue
-                except Exception as e:
-                    self.log(f"Error con codificación {encoding}: {str(e)}")
-                    continue
-                    
-            if df is None:
-                raise Exception("No se pudo leer el archivo con ninguna codificación")
-            
-            # ..normaliza nombres de columnas
-            df.columns = [self.normalizar_texto(col) for col in df.columns]
+        self.log("Iniciando proceso de normalización...")
+        self.cache.reiniciar_estadisticas()
+        self.progreso.set(0)
+        self.boton_normalizar.config(state=tk.DISABLED)
+        self.boton_cancelar.config(state=tk.NORMAL)
+        # ..las variables de Tkinter sólo se leen desde el hilo de la interfaz
+        self.tarea.iniciar(self.normalizar_archivo, self.archivo_entrada.get(), self.archivo_salida.get())
+        
+    def normalizar_archivo(self, archivo_entrada, archivo_salida):
+        # ..corre en el hilo de normalización; el avance se informa por la cola
+        # ..lectura, normalización y escritura son las de `normalizador_cli.py --variante basico`:
+        # celdas leídas como texto (un "007" queda "007") y salida según la extensión
+        opciones = dict(
+            cache=self.cache,
+            al_avanzar=lambda fraccion, mensaje: self.tarea.enviar('avance', fraccion, mensaje),
+            cancelar=self.tarea.cancelar
+        )
+        if motor.es_csv(archivo_entrada):
+            with entrada.ArchivoMapeado(archivo_entrada) as mapeado:
+                # ..decide la codificación en una pasada (BOM o UTF-8 válido, si no latin-1)
+                encoding, motivo = deteccion.detectar_encoding_utf8(mapeado)
+                self.log(f"Codificación: {encoding} ({motivo})")
+                dialecto = deteccion.detectar_dialecto(mapeado, encoding)
+                self.log(f"Formato: {dialecto.descripcion()}")
+                motor.normalizar_archivo(
+                    mapeado, archivo_salida, variantes.VARIANTES['basico'],
+                    encoding=encoding, delimitador=dialecto.delimitador, comillas=dialecto.comillas,
+                    **opciones
+                )
+        else:
+            # ..un Excel no tiene codificación de texto; se lee una sola vez
+            motor.normalizar_archivo(archivo_entrada, archivo_salida, variantes.VARIANTES['basico'], **opciones)
+        self.log(self.cache.resumen())
             
-            # ..normaliza contenido
-            for columna in df.columns:
-                self.log(f"Normalizando columna: {columna}")
-                df[columna] = df[columna].apply(self.normalizar_texto)
+    def cancelar_proceso(self):
+        if self.tarea.en_curso():
+            self.tarea.cancelar.set()
+            self.boton_cancelar.config(state=tk.DISABLED)
+            self.log("Cancelando... se detendrá al terminar la columna en curso")
             
-            # ..guarda archivo normalizado
-            if self.archivo_salida.get().endswith('.csv'):
-                df.to_csv(self.archivo_salida.get(), index=False, encoding='utf-8')
+    def recibir_mensaje(self, tipo, *datos):
+        # ..mensajes del hilo de normalización, atendidos en el hilo de la interfaz
+        if tipo == 'log':
+            self.log(*datos)
+        elif tipo == 'avance':
+            fraccion, mensaje = datos
+            self.progreso.set(fraccion * 100)
+            self.log(mensaje)
+        else:
+            self.boton_normalizar.config(state=tk.NORMAL)
+            self.boton_cancelar.config(state=tk.DISABLED)
+            if tipo == 'fin':
+                self.progreso.set(100)
+                self.log("¡Proceso completado exitosamente!")
+                messagebox.showinfo("Éxito", "Archivo normalizado correctamente")
+            elif tipo == 'cancelado':
+                self.progreso.set(0)
+                self.log("Proceso cancelado; no se guardó el archivo de salida")
+                messagebox.showwarning("Cancelado", "La normalización fue cancelada")
             else:
-                df.to_excel(self.archivo_salida.get(), index=False)
-                
-            self.log("¡Proceso completado exitosamente!")
-            messagebox.showinfo("Éxito", "Archivo normalizado correctamente")
-            
-        except Exception as e:
-            self.log(f"Error: {str(e)}")
-            messagebox.showerror("Error", f"Error al procesar el archivo: {str(e)}")
+                self.progreso.set(0)
+                self.log(f"Error: {str(datos[0])}")
+                messagebox.showerror("Error", f"Error al procesar el archivo: {str(datos[0])}")
 
 #...................................................... | FUNCION MAIN
 def main():
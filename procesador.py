@@ -0,0 +1,405 @@
+"""
+PROCESAMIENTO DE DATOS DEL NORMALIZADOR UNIVERSAL
+Desarrollado por Felipe Alexander Correa Rodríguez
+
+Reglas de fechas, valores monetarios y horas de normalizadorfinal.py, sin
+dependencia de la interfaz gráfica para poder usarlas desde procesos
+trabajadores y desde la línea de comandos.
+
+Las columnas de fecha se convierten completas con pd.to_datetime: se infiere
+el formato dominante sobre una muestra de la columna, se convierte todo con
+ese formato y sólo los valores que fallan prueban los demás formatos. El
+resultado es el mismo que aplicar normalizar_fecha celda a celda.
+
+Las columnas monetarias se separan en monto y horas con una sola pasada de
+str.extract sobre sus valores únicos y una conversión vectorizada a float,
+con el mismo resultado que procesar_valor_monetario y procesar_horas.
+
+Antes de normalizar, cada columna se clasifica por su nombre, su dtype y una
+muestra de su contenido (numérica, fecha, monetaria, categórica o texto
+libre) y pasa al normalizador de su clase; las columnas numéricas quedan
+tal cual, sin pasar por la normalización de texto.
+"""
+
+#...................................................... | STACK DE LIBRERÍAS
+import re
+from datetime import datetime
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+import instrumentacion
+import normalizacion
+
+#...................................................... | CONFIGURACIÓN
+# ..formatos que reconoce normalizar_fecha, en su orden de prueba
+FORMATOS_FECHA = ['%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d.%m.%Y', '%d/%m/%y']
+FORMATO_SALIDA_FECHA = '%Y-%m-%d'
+MUESTRA_FECHAS = 1000  # ..valores usados para inferir el formato de una columna
+
+# ..clases de columna, en el orden en que se muestran
+NUMERICA = 'numerica'
+FECHA = 'fecha'
+MONETARIA = 'monetaria'
+CATEGORICA = 'categorica'
+TEXTO = 'texto'
+CLASES_COLUMNA = (NUMERICA, FECHA, MONETARIA, CATEGORICA, TEXTO)
+MUESTRA_CLASIFICACION = 1000  # ..valores usados para clasificar una columna por su contenido
+UMBRAL_CATEGORICA = 0.5  # ..proporción máxima de valores distintos en la muestra de una categórica
+# ..proporción mínima de fechas o números en la muestra; el resto se normaliza como texto
+UMBRAL_CLASE = 0.9
+# ..número con separadores de miles o decimales: "12", "-3,5", "1.234.567,89"
+PATRON_NUMERO = re.compile(r'[+-]?\d+(?:[.,]\d+)*')
+PATRON_MONEDA = re.compile(r'\$\s?\d')
+PATRON_FECHA_SALIDA = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# ..monto: el primer número de la celda, como r'\$?\s?(\d+[\d\.,]*)' en procesar_valor_monetario
+# ..horas: el primer número seguido de "hr"/"hrs", como en procesar_horas
+PATRON_MONTO_HORAS = re.compile(
+    r'(?s)^(?=(?:\D*(?P<monto>\d[\d.,]*))?)'
+    r'(?=(?:.*?(?P<horas>\d+[.,]\d+|\d+)\s*hrs?)?)'
+)
+NUMERO_ASCII = re.compile(r'[0-9]+\.?[0-9]*')
+
+#...................................................... | PROCESADOR DE DATOS
+class ProcesadorDatos:
+    """Clase para el procesamiento de datos"""
+    
+    @staticmethod
+    def es_fecha(texto):
+        patrones_fecha = [
+            r'\d{2}/\d{2}/\d{4}',
+            r'\d{2}-\d{2}-\d{4}',
+            r'\d{2}\.\d{2}\.\d{4}',
+            r'\d{4}/\d{2}/\d{2}',
+            r'\d{4}-\d{2}-\d{2}',
+            r'\d{2}/\d{2}/\d{2}',
+        ]
+        return any(re.match(pattern, str(texto)) for pattern in patrones_fecha)
+
+    @staticmethod
+    def normalizar_fecha(texto):
+        try:
+            if pd.isna(texto):
+                return None
+                
+            # Eliminar espacios y caracteres no deseados
+            texto = str(texto).strip()
+            
+            # Intentar diferentes formatos de fecha
+            for formato in FORMATOS_FECHA:
+                try:
+                    fecha = datetime.strptime(texto, formato)
+                    return fecha.strftime(FORMATO_SALIDA_FECHA)
+                except ValueError:
+                    continue
+                    
+            return texto
+        except Exception:
+            return texto
+
+    @staticmethod
+    def procesar_valor_monetario(texto):
+        """
+        Procesa un valor monetario y devuelve el monto como número.
+        Ejemplo: "$ 13.843 : 4,00 hrs" -> 13843.0
+        """
+        try:
+            if pd.isna(texto) or texto == '' or texto.upper() == 'NO TIENE':
+                return 0.0
+
+            # Buscar el monto hasta el primer espacio (ej: "$ 13.843")
+            match = re.search(r'\$?\s?(\d+[\d\.,]*)', str(texto))
+            if match:
+                monto = match.group(1).replace('.', '').replace(',', '.')
+                return float(Decimal(monto))
+            return 0.0
+        except Exception:
+            return 0.0
+
+    @staticmethod
+    def procesar_horas(texto):
+        """
+        Procesa las horas y devuelve el valor como número.
+        Ejemplo: "$ 13.843 : 4,00 hrs" -> 4.0
+        """
+        try:
+            if pd.isna(texto) or texto == '' or texto.upper() == 'NO TIENE':
+                return 0.0
+
+            # Buscar el patrón de horas (ej: "4,00 hrs")
+            match = re.search(r'(\d+[\.,]\d+|\d+)\s*hrs?', str(texto))
+            if match:
+                horas = match.group(1).replace(',', '.')
+                return float(Decimal(horas))
+            return 0.0
+        except Exception:
+            return 0.0
+
+    @staticmethod
+    def normalizar_nombre_columna(nombre):
+        """Normaliza el nombre de una columna"""
+        nombre = str(nombre).strip().upper()
+        nombre = normalizacion.transliterar(nombre)
+        nombre = re.sub(r'[^A-Z0-9_]', '_', nombre)
+        nombre = re.sub(r'_+', '_', nombre)
+        return nombre.strip('_')
+
+    @staticmethod
+    def es_columna_fecha(nombre_columna):
+        return any(palabra in nombre_columna.upper() for palabra in ['FECHA', 'DATE'])
+
+    @staticmethod
+    def es_columna_monetaria(nombre_columna):
+        palabras_clave = ['MONTO', 'VALOR', 'PRECIO', 'EXTRAORDINARIA', 'PAGO']
+        return any(palabra in nombre_columna.upper() for palabra in palabras_clave)
+
+#...................................................... | FECHAS POR COLUMNA
+def inferir_formato_fecha(textos):
+    """Formato de FORMATOS_FECHA que convierte más valores de una muestra; None si ninguno"""
+    if len(textos) > MUESTRA_FECHAS:
+        textos = textos.iloc[np.linspace(0, len(textos) - 1, MUESTRA_FECHAS).astype(int)]
+    conversiones = {
+        formato: pd.to_datetime(textos, format=formato, errors='coerce').notna().sum()
+        for formato in FORMATOS_FECHA
+    }
+    formato = max(FORMATOS_FECHA, key=conversiones.get)
+    return formato if conversiones[formato] else None
+
+def convertir_fechas(textos):
+    """
+    Convierte una columna de textos ya limpios: primero con el formato
+    dominante y luego, sólo a lo que queda, con los demás formatos. Lo que
+    pandas no convierte y tiene dígitos (por ejemplo fechas fuera de su rango)
+    pasa por normalizar_fecha.
+    """
+    resultado = textos.astype(object)
+    formato = inferir_formato_fecha(textos)
+    formatos = [formato] + [otro for otro in FORMATOS_FECHA if otro != formato] if formato else FORMATOS_FECHA
+    pendientes = textos
+    for formato in formatos:
+        if pendientes.empty:
+            break
+        fechas = pd.to_datetime(pendientes, format=formato, errors='coerce')
+        convertidas = fechas.notna()
+        resultado[convertidas.index[convertidas]] = fechas[convertidas].dt.strftime(FORMATO_SALIDA_FECHA)
+        pendientes = pendientes[~convertidas]
+
+    # ..sin dígitos ningún formato aplica y el texto queda tal cual
+    restantes = pendientes[pendientes.str.contains(r'\d', regex=True)]
+    if not restantes.empty:
+        resultado[restantes.index] = restantes.map(ProcesadorDatos.normalizar_fecha)
+    return resultado
+
+def normalizar_serie_fecha(serie, cache=None):
+    """
+    Equivalente por columna de serie.apply(ProcesadorDatos.normalizar_fecha);
+    sólo se convierten los valores únicos de la columna. Con cache
+    (CacheNormalizacion) los valores únicos se buscan primero ahí y en su
+    caché persistente, bajo el nombre 'fecha'.
+    """
+    nulos = serie.isna()
+    resultado = pd.Series(None, index=serie.index, dtype=object)
+
+    # ..celdas que ya son fechas (ej: leídas desde Excel) sólo toman el formato de salida
+    if es_serie_de_fechas(serie):
+        fechas = pd.to_datetime(serie[~nulos])
+        resultado[~nulos] = fechas.dt.strftime(FORMATO_SALIDA_FECHA).to_numpy(dtype=object)
+        return resultado
+
+    textos = normalizacion.como_texto(serie[~nulos]).str.strip()
+
+    # ..pd.factorize corta en el carácter NUL los textos que no usan pyarrow
+    if normalizacion.SEPARADOR in ''.join(textos):
+        resultado[~nulos] = convertir_fechas(textos)
+        return resultado
+
+    codigos, unicos = pd.factorize(textos)
+    unicos = pd.Series(unicos, dtype=object)
+    if cache is not None and len(unicos) <= len(textos) * normalizacion.UMBRAL_UNICOS:
+        convertidos = cache.normalizar(unicos, convertir_fechas, 'fecha')
+    else:
+        convertidos = convertir_fechas(unicos)
+    resultado[~nulos] = convertidos.to_numpy(dtype=object)[codigos]
+    return resultado
+
+#...................................................... | MONTOS Y HORAS POR COLUMNA
+def convertir_numeros(numeros, textos, funcion_celda):
+    """
+    Convierte los números extraídos (ya con punto decimal) a float. Los que
+    no son un número ASCII válido (ej: "1.2.3" o dígitos no ASCII) usan la
+    versión por celda; las celdas sin número quedan en 0.0.
+    """
+    resultado = pd.Series(0.0, index=numeros.index)
+    validos = numeros.str.fullmatch(NUMERO_ASCII).fillna(False).astype(bool)
+    # ..astype(float) redondea igual que float(Decimal(...)); pd.to_numeric no en números largos
+    resultado[validos] = numeros[validos].astype(float)
+    revisar = numeros.notna() & ~validos
+    if revisar.any():
+        resultado[revisar] = textos[revisar].map(funcion_celda)
+    return resultado
+
+def convertir_monto_horas(textos):
+    """Monto y horas de una columna de textos, como columnas float"""
+    partes = textos.str.extract(PATRON_MONTO_HORAS)
+    montos = partes['monto'].str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    horas = partes['horas'].str.replace(',', '.', regex=False)
+    return (
+        convertir_numeros(montos, textos, ProcesadorDatos.procesar_valor_monetario),
+        convertir_numeros(horas, textos, ProcesadorDatos.procesar_horas)
+    )
+
+def extraer_monto_horas(serie):
+    """
+    Equivalente por columna de serie.apply(procesar_valor_monetario) y
+    serie.apply(procesar_horas). Las celdas nulas, vacías, "NO TIENE" (no
+    tienen dígitos) y las que no son texto quedan en 0.0.
+    """
+    montos = pd.Series(0.0, index=serie.index)
+    horas = pd.Series(0.0, index=serie.index)
+    if pd.api.types.infer_dtype(serie, skipna=True) in ('string', 'empty'):
+        es_texto = serie.notna()
+    else:
+        es_texto = serie.map(lambda valor: isinstance(valor, str)).astype(bool)
+    textos = serie[es_texto].astype(object)
+    if textos.empty:
+        return montos, horas
+
+    # ..pd.factorize corta en el carácter NUL los textos que no usan pyarrow
+    if normalizacion.SEPARADOR in ''.join(textos):
+        montos[es_texto], horas[es_texto] = convertir_monto_horas(textos)
+        return montos, horas
+
+    codigos, unicos = pd.factorize(textos)
+    montos_unicos, horas_unicos = convertir_monto_horas(pd.Series(unicos, dtype=object))
+    montos[es_texto] = montos_unicos.to_numpy()[codigos]
+    horas[es_texto] = horas_unicos.to_numpy()[codigos]
+    return montos, horas
+
+#...................................................... | CLASIFICACIÓN DE COLUMNAS
+def es_serie_de_fechas(serie):
+    """Columna datetime64 o de objetos fecha (ej: celdas de fecha de openpyxl)"""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return True
+    return serie.dtype == object and pd.api.types.infer_dtype(serie, skipna=True) in ('datetime', 'date')
+
+def muestra_columna(textos):
+    """Hasta MUESTRA_CLASIFICACION valores repartidos en toda la columna"""
+    if len(textos) > MUESTRA_CLASIFICACION:
+        textos = textos.iloc[np.linspace(0, len(textos) - 1, MUESTRA_CLASIFICACION).astype(int)]
+    return textos
+
+def clasificar_columna(nombre, serie):
+    """
+    Clase de una columna (ver CLASES_COLUMNA). Primero las reglas por nombre
+    de normalizadorfinal.py (fecha y monetaria), luego el dtype y por último
+    una muestra del contenido. Una columna es de fecha o numérica por su
+    contenido si lo son casi todos los valores de la muestra (UMBRAL_CLASE):
+    los demás valores se normalizan como texto (ver normalizar_datos_final),
+    así un valor distinto no cambia la clase de toda la columna y la clase
+    del primer bloque sirve para los siguientes.
+    """
+    if ProcesadorDatos.es_columna_fecha(nombre):
+        return FECHA
+    if ProcesadorDatos.es_columna_monetaria(nombre):
+        return MONETARIA
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return NUMERICA
+    if es_serie_de_fechas(serie):
+        return FECHA
+
+    textos = normalizacion.como_texto(serie.dropna()).str.strip()
+    textos = textos[textos != '']
+    if textos.empty:
+        return TEXTO
+    muestra = muestra_columna(textos)
+
+    # ..las fechas "05.01.2024" también calzan con PATRON_NUMERO; se prueban antes
+    convertidas = np.zeros(len(muestra), dtype=bool)
+    for formato in FORMATOS_FECHA:
+        convertidas |= pd.to_datetime(muestra, format=formato, errors='coerce').notna().to_numpy()
+    if convertidas.mean() >= UMBRAL_CLASE:
+        return FECHA
+    if muestra.str.fullmatch(PATRON_NUMERO).mean() >= UMBRAL_CLASE:
+        return NUMERICA
+    if muestra.str.contains(PATRON_MONEDA).all():
+        return MONETARIA
+    if muestra.nunique() <= len(muestra) * UMBRAL_CATEGORICA:
+        return CATEGORICA
+    return TEXTO
+
+def clasificar_columnas(df):
+    """{columna: clase} de cada columna de un DataFrame con encabezados ya normalizados"""
+    return {columna: clasificar_columna(columna, df[columna]) for columna in df.columns}
+
+def resumen_clases(clases):
+    """Cantidad de columnas de cada clase, para el log y el panel de análisis"""
+    cantidades = [(clase, list(clases.values()).count(clase)) for clase in CLASES_COLUMNA]
+    return ', '.join(f"{cantidad} {clase}" for clase, cantidad in cantidades if cantidad)
+
+#...................................................... | NORMALIZACIÓN POR COLUMNA
+def normalizar_encabezados_final(df):
+    """Normaliza los nombres de columnas de un DataFrame"""
+    df.columns = [ProcesadorDatos.normalizar_nombre_columna(col) for col in df.columns]
+    return df
+
+def normalizar_serie_texto_libre(serie):
+    """
+    Texto libre: casi todos sus valores son distintos, así que se normaliza la
+    columna completa sin factorizarla ni consultar la caché.
+    """
+    return normalizacion.PERFILES['final'].traducir(normalizacion.como_texto(serie))
+
+def normalizar_fuera_de_clase(resultado, serie, en_clase, cache=None):
+    """
+    Los valores no nulos de serie que no calzan con la clase de la columna
+    (en_clase False) se normalizan como texto categórico en resultado. Pasa
+    cuando la clase viene fijada de antes (primer bloque o corrida anterior)
+    y los datos nuevos ya no son de esa clase: quedan como si la columna se
+    hubiera clasificado como texto, igual que al procesarla completa.
+    """
+    otros = serie.index[serie.notna().to_numpy() & ~np.asarray(en_clase, dtype=bool)]
+    if otros.empty:
+        return resultado
+    resultado = resultado.astype(object)
+    resultado[otros] = normalizacion.normalizar_serie_final(serie[otros], cache).to_numpy(dtype=object)
+    return resultado
+
+def normalizar_serie_numerica(serie, cache=None):
+    """Los números quedan tal cual; el resto (ver normalizar_fuera_de_clase) como texto"""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie
+    textos = normalizacion.como_texto(serie.fillna('')).str.strip()
+    return normalizar_fuera_de_clase(serie, serie, textos.eq('') | textos.str.fullmatch(PATRON_NUMERO), cache)
+
+def normalizar_datos_final(df, cache=None, clases=None):
+    """
+    Normaliza cada columna con el normalizador de su clase: las numéricas
+    quedan tal cual, fechas y montos con sus reglas y el resto como texto.
+    clases ({columna: clase}) fija la clasificación, para que todos los
+    bloques de un archivo usen la misma; sin clases se clasifica df. Los
+    valores que no calzan con una clase numérica o de fecha por contenido se
+    normalizan como texto, así un bloque posterior queda igual que en memoria.
+    """
+    for columna in df.columns:
+        clase = clases[columna] if clases and columna in clases else clasificar_columna(columna, df[columna])
+        with instrumentacion.etapa('columna', columna=str(columna), clase=clase, filas=len(df)):
+            if clase == NUMERICA:
+                df[columna] = normalizar_serie_numerica(df[columna], cache)
+            elif clase == FECHA:
+                fechas = normalizar_serie_fecha(df[columna], cache)
+                # ..una columna de fecha por su nombre deja tal cual lo que no es fecha
+                if not ProcesadorDatos.es_columna_fecha(columna):
+                    en_clase = fechas.isna() | normalizacion.como_texto(fechas.fillna('')).str.fullmatch(
+                        PATRON_FECHA_SALIDA)
+                    fechas = normalizar_fuera_de_clase(fechas, df[columna], en_clase, cache)
+                df[columna] = fechas
+            elif clase == MONETARIA:
+                df[f"{columna}_MONTO"], df[f"{columna}_HORAS"] = extraer_monto_horas(df[columna])
+                df.drop(columna, axis=1, inplace=True)
+            elif clase == CATEGORICA:
+                df[columna] = normalizacion.normalizar_serie_final(df[columna], cache)
+            elif clase == TEXTO:
+                df[columna] = normalizar_serie_texto_libre(df[columna])
+    return df
+
+#...................................................... | END
\ No newline at end of file
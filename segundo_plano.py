@@ -0,0 +1,71 @@
+"""
+PROCESAMIENTO EN SEGUNDO PLANO PARA LAS INTERFACES TKINTER
+Desarrollado por Felipe Alexander Correa Rodríguez
+
+La normalización corre en un hilo aparte para que la ventana nunca se
+bloquee. El hilo no toca la interfaz: deja sus mensajes (log, avance, fin,
+error) en una cola que la ventana retira periódicamente con root.after.
+"""
+
+#...................................................... | STACK DE LIBRERÍAS
+import queue
+import threading
+import motor
+
+#...................................................... | CONFIGURACIÓN
+INTERVALO_MS = 100  # ..cada cuánto la ventana revisa la cola de mensajes
+
+#...................................................... | TAREA
+class TareaSegundoPlano:
+    """
+    Ejecuta una función en un hilo y entrega sus mensajes a al_mensaje(tipo, *datos)
+    en el hilo de la interfaz. Tipos: los que envíe la función con enviar(), más
+    'fin', 'cancelado' y 'error' al terminar.
+    """
+
+    def __init__(self, root, al_mensaje):
+        self.root = root
+        self.al_mensaje = al_mensaje
+        self.cola = queue.Queue()
+        self.cancelar = threading.Event()
+        self.hilo = None
+
+    def en_curso(self):
+        return self.hilo is not None and self.hilo.is_alive()
+
+    def en_hilo_de_trabajo(self):
+        return self.hilo is not None and threading.current_thread() is self.hilo
+
+    def iniciar(self, funcion, *args):
+        if self.en_curso():
+            raise RuntimeError("Ya hay un proceso en curso")
+        self.cancelar.clear()
+        self.hilo = threading.Thread(target=self.ejecutar, args=(funcion, *args), daemon=True)
+        self.hilo.start()
+        self.root.after(INTERVALO_MS, self.revisar)
+
+    def ejecutar(self, funcion, *args):
+        try:
+            resultado = funcion(*args)
+            self.enviar('fin', resultado)
+        except motor.ProcesoCancelado:
+            self.enviar('cancelado')
+        except Exception as e:
+            self.enviar('error', e)
+
+    def enviar(self, tipo, *datos):
+        """Deja un mensaje para la interfaz (se puede llamar desde cualquier hilo)"""
+        self.cola.put((tipo, *datos))
+
+    def revisar(self):
+        """Entrega los mensajes pendientes; se reprograma mientras el hilo siga vivo"""
+        while True:
+            try:
+                mensaje = self.cola.get_nowait()
+            except queue.Empty:
+                break
+            self.al_mensaje(*mensaje)
+        if self.en_curso() or not self.cola.empty():
+            self.root.after(INTERVALO_MS, self.revisar)
+
+#...................................................... | END
@@ -0,0 +1,57 @@
+"""El modo por bloques escribe lo mismo que el proceso en memoria"""
+
+import pytest
+import motor
+import variantes
+
+def filas_obs():
+    # ..Obs es numérica en el primer bloque y trae texto en el segundo
+    return ['ID,Obs'] + [f'{i},{i * 3}' for i in range(600)] + ['600,José Peña', '601,12']
+
+def filas_fechas():
+    # ..Cuando es de fecha por su contenido y trae un texto en el segundo bloque
+    return (['ID,Cuando'] + [f'{i},0{1 + i % 9}/01/2024' for i in range(600)]
+            + ['600,pronto', '601,05/02/2024', '602,'])
+
+@pytest.mark.parametrize('filas', [filas_obs(), filas_fechas()], ids=['numerica', 'fecha'])
+@pytest.mark.parametrize('variante', sorted(variantes.VARIANTES))
+def test_bloques_igual_que_en_memoria(tmp_path, filas, variante):
+    entrada = tmp_path / 'entrada.csv'
+    entrada.write_text('\n'.join(filas) + '\n', encoding='utf-8')
+    en_memoria, por_bloques = tmp_path / 'memoria.csv', tmp_path / 'bloques.csv'
+
+    motor.normalizar_archivo(entrada, en_memoria, variantes.VARIANTES[variante], 'utf-8', ',')
+    motor.normalizar_archivo(entrada, por_bloques, variantes.VARIANTES[variante], 'utf-8', ',', tamano_bloque=500)
+
+    assert por_bloques.read_bytes() == en_memoria.read_bytes()
+
+def test_columnar_mismo_esquema_en_bloques(tmp_path):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    entrada = tmp_path / 'entrada.csv'
+    # ..valores que no son números canónicos después del primer bloque
+    filas = ['ID,CANTIDAD,MONTO'] + [f'{i},{i},$ {i}' for i in range(600)] + ['600,1.50,$ 1', '601,S/N,']
+    entrada.write_text('\n'.join(filas) + '\n', encoding='utf-8')
+    en_memoria, por_bloques = tmp_path / 'memoria.parquet', tmp_path / 'bloques.parquet'
+
+    motor.normalizar_archivo(entrada, en_memoria, variantes.VARIANTES['final'], 'utf-8', ',')
+    motor.normalizar_archivo(entrada, por_bloques, variantes.VARIANTES['final'], 'utf-8', ',', tamano_bloque=500)
+
+    assert parquet.read_table(por_bloques).equals(parquet.read_table(en_memoria))
+
+@pytest.mark.parametrize('variante', sorted(variantes.VARIANTES))
+def test_excel_bloques_igual_que_en_memoria(tmp_path, variante):
+    openpyxl = pytest.importorskip('openpyxl')
+    entrada = tmp_path / 'entrada.xlsx'
+    libro = openpyxl.Workbook()
+    hoja = libro.active
+    hoja.append(['Cod', 'Nombre', 'Cantidad'])
+    for codigo, nombre, cantidad in [('007', 'José', 3), ('008', 'Peña', 4.5), (None, 'Ana', None)]:
+        hoja.append([codigo, nombre, cantidad])
+    libro.save(entrada)
+    en_memoria, por_bloques = tmp_path / 'memoria.csv', tmp_path / 'bloques.csv'
+
+    motor.normalizar_archivo(entrada, en_memoria, variantes.VARIANTES[variante])
+    motor.normalizar_archivo(entrada, por_bloques, variantes.VARIANTES[variante], tamano_bloque=1)
+
+    assert por_bloques.read_bytes() == en_memoria.read_bytes()
+    assert b'007' in en_memoria.read_bytes()
@@ -0,0 +1,10 @@
+"""La tabla de transliteración precalculada da lo mismo que unidecode"""
+
+import normalizacion
+
+def test_transliterar_igual_que_unidecode():
+    assert normalizacion.verificar_transliteracion() == []
+
+def test_transliterar_texto_mixto():
+    texto = 'Peña Ñuñoa, Œuvre – «José» ½ 中'
+    assert normalizacion.transliterar(texto) == normalizacion.unidecode.unidecode(texto)
@@ -0,0 +1,84 @@
+"""
+VARIANTES DEL NORMALIZADOR
+Desarrollado por Felipe Alexander Correa Rodríguez
+
+Reglas de cada script reunidas sin dependencia de Tkinter, para usarlas desde
+la línea de comandos o desde procesos trabajadores:
+- basico    -> normalizadorhdc.py
+- universal -> normalizador.py
+- final     -> normalizadorfinal.py
+"""
+
+#...................................................... | STACK DE LIBRERÍAS
+import csv
+from functools import partial
+import normalizacion
+import procesador
+
+#...................................................... | VARIANTE
+class Variante:
+    """Funciones y opciones de lectura/escritura de una variante del normalizador"""
+
+    def __init__(self, nombre, script, normalizar_encabezados, normalizar_datos,
+                 opciones_lectura=None, opciones_escritura=None, es_columna_fecha=None,
+                 clasificar_columnas=None):
+        self.nombre = nombre
+        self.script = script
+        # ..DataFrame -> DataFrame con los nombres de columnas normalizados
+        self.normalizar_encabezados = normalizar_encabezados
+        # ..(DataFrame, cache) -> DataFrame normalizado; función de módulo para poder enviarla a procesos
+        self.normalizar_datos = normalizar_datos
+        self.opciones_lectura = opciones_lectura or {}
+        self.opciones_escritura = opciones_escritura or {}
+        # ..nombre -> bool; columnas que la variante deja como fecha %Y-%m-%d (date en PostgreSQL)
+        self.es_columna_fecha = es_columna_fecha
+        # ..DataFrame -> {columna: clase}; normalizar_datos recibe entonces clases=
+        self.clasificar_columnas = clasificar_columnas
+
+    def clasificar(self, df):
+        """{columna: clase} de df, o None si la variante no clasifica columnas"""
+        if self.clasificar_columnas is None:
+            return None
+        return self.clasificar_columnas(df)
+
+    def preparar(self, df, clases=None):
+        """
+        normalizar_datos con la clasificación de columnas fijada a partir de df
+        (el archivo completo o su primer bloque), o con clases si se indican,
+        para que todos los bloques y procesos traten cada columna igual
+        """
+        if self.clasificar_columnas is None:
+            return self.normalizar_datos
+        return partial(self.normalizar_datos, clases=clases if clases is not None else self.clasificar(df))
+
+    def huella(self):
+        """Identificador de las reglas de la variante; cambia si cambian las reglas o los perfiles"""
+        pasos = {nombre: perfil.pasos for nombre, perfil in normalizacion.PERFILES.items()}
+        return normalizacion.huella_reglas(self.nombre, pasos)
+
+VARIANTES = {
+    'basico': Variante(
+        'basico',
+        'normalizadorhdc.py',
+        normalizacion.normalizar_encabezados_basico,
+        normalizacion.normalizar_datos_basico
+    ),
+    'universal': Variante(
+        'universal',
+        'normalizador.py',
+        normalizacion.normalizar_encabezados_universal,
+        normalizacion.normalizar_datos_universal,
+        opciones_lectura={'on_bad_lines': 'skip', 'low_memory': False},
+        opciones_escritura={'sep': ',', 'quoting': csv.QUOTE_MINIMAL}
+    ),
+    'final': Variante(
+        'final',
+        'normalizadorfinal.py',
+        procesador.normalizar_encabezados_final,
+        procesador.normalizar_datos_final,
+        es_columna_fecha=procesador.ProcesadorDatos.es_columna_fecha,
+        clasificar_columnas=procesador.clasificar_columnas
+    ),
+}
+
+#...................................................... | END
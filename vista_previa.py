@@ -0,0 +1,251 @@
+"""
+VISTA PREVIA Y ESTIMACIÓN DEL ARCHIVO
+Desarrollado por Felipe Alexander Correa Rodríguez
+
+Analiza un archivo de cualquier tamaño en un tiempo acotado (por defecto 2
+segundos) sin leerlo completo. De un CSV se leen rangos de bytes repartidos
+en el archivo (inicio, final, medio y luego posiciones intermedias, como en
+deteccion.leer_muestras) hasta agotar el presupuesto de bytes o la mitad del
+tiempo; cada rango se recorta a líneas completas y se lee como el resto del
+normalizador (celdas como texto, opciones de la variante). De un Excel se
+leen las primeras filas de la primera hoja.
+
+Con esa muestra se estiman:
+- filas: bytes del archivo / bytes promedio por fila de la muestra (exacto
+  si el archivo cabe en la muestra)
+- columnas y su clase (numérica, fecha, monetaria, categórica, texto)
+- memoria de la tabla leída como texto (memory_usage de la muestra por fila)
+- tiempo de normalización: se normalizan partes de la muestra durante el
+  resto del presupuesto y se extrapola por fila, sin caché (una corrida
+  real reutiliza valores repetidos y suele ser más rápida)
+
+Las primeras filas del archivo se entregan ya normalizadas, para revisar el
+resultado antes de la corrida completa.
+"""
+
+#...................................................... | STACK DE LIBRERÍAS
+import codecs
+import io
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import deteccion
+import instrumentacion
+import motor
+import procesador
+from entrada import ArchivoMapeado
+
+#...................................................... | CONFIGURACIÓN
+PRESUPUESTO_SEGUNDOS = 2.0
+FRACCION_LECTURA = 0.5  # ..parte del presupuesto para leer muestras; el resto mide la normalización
+PRESUPUESTO_BYTES = 4 << 20  # ..máximo de bytes leídos de un CSV
+TAMANO_MUESTRA = 64 << 10
+FILAS_EXCEL = procesador.MUESTRA_CLASIFICACION
+BLOQUE_EXCEL = 200
+FILAS_VISTA = 5
+FILAS_PARTE = 250  # ..filas por parte al medir la normalización
+FILAS_MEDIDAS = 5000  # ..con estas filas medidas la estimación ya no mejora
+INTENTOS_CORTE = 5  # ..líneas que se retroceden si el corte queda dentro de un campo entre comillas
+
+#...................................................... | RESULTADO
+class Estimacion:
+    """Estimaciones de un archivo a partir de una muestra (ver arriba)"""
+
+    def __init__(self, filas, exacta, clases, memoria_mb, segundos, vista, muestra, segundos_analisis):
+        self.filas = filas
+        # ..True si la muestra cubrió el archivo completo
+        self.exacta = exacta
+        # ..{columna normalizada: clase}, en el orden del archivo
+        self.clases = clases
+        self.memoria_mb = memoria_mb
+        self.segundos = segundos
+        # ..primeras filas ya normalizadas
+        self.vista = vista
+        # ..filas leídas como texto, con los encabezados originales
+        self.muestra = muestra
+        self.segundos_analisis = segundos_analisis
+
+    @property
+    def columnas(self):
+        return list(self.clases)
+
+    def descripcion(self):
+        aproximado = '' if self.exacta else '~'
+        return (
+            f"{aproximado}{self.filas:,} filas, {len(self.clases)} columnas, "
+            f"{aproximado}{formato_memoria(self.memoria_mb)} en memoria, "
+            f"{formato_duracion(self.segundos)} normalizando"
+        )
+
+def formato_memoria(megabytes):
+    if megabytes >= 1024:
+        return f"{megabytes / 1024:.1f} GB"
+    return f"{megabytes:.0f} MB" if megabytes >= 10 else f"{megabytes:.1f} MB"
+
+def formato_duracion(segundos):
+    if segundos < 1:
+        return "menos de 1 s"
+    if segundos < 90:
+        return f"~{segundos:.0f} s"
+    if segundos < 5400:
+        return f"~{segundos / 60:.0f} min"
+    return f"~{segundos / 3600:.1f} h"
+
+#...................................................... | MUESTRAS
+def leer_texto(texto, encoding, delimitador, comillas, opciones):
+    """
+    Lee el texto de una muestra. Si termina dentro de un campo entre comillas
+    con saltos de línea, se retrocede una línea y se vuelve a intentar.
+    Devuelve (DataFrame, texto leído).
+    """
+    for intento in range(INTENTOS_CORTE + 1):
+        try:
+            return motor.leer_csv(io.StringIO(texto), encoding, delimitador, comillas=comillas, **opciones), texto
+        except pd.errors.ParserError:
+            if intento == INTENTOS_CORTE:
+                raise
+            texto = texto[:texto.rfind('\n', 0, len(texto) - 1) + 1]
+            if not texto:
+                raise
+
+def muestras_csv(mapeado, encoding, delimitador, comillas, opciones, limite):
+    """
+    Lee los rangos de muestra de un CSV mapeado hasta el instante limite
+    (perf_counter). Devuelve (columnas, DataFrames, bytes que cubren sin el
+    encabezado, bytes del encabezado, True si se leyó el archivo completo).
+    Los encabezados se leen aparte, del inicio del archivo: una muestra sin
+    líneas completas (encabezado o filas más largas que la muestra) sólo se
+    descarta, aunque sea la primera.
+    """
+    columnas = motor.leer_csv(mapeado, encoding, delimitador, comillas=comillas, nrows=0, **opciones).columns
+    bloques = deteccion.leer_muestras(mapeado, PRESUPUESTO_BYTES, TAMANO_MUESTRA)
+    completo = mapeado.tamano <= PRESUPUESTO_BYTES
+    # ..en UTF-16/32 un salto de línea no marca el inicio de un carácter; se usa sólo el inicio
+    ancho = codecs.lookup(encoding).name.startswith(('utf-16', 'utf-32'))
+
+    partes = []
+    cubiertos = 0
+    # ..aproximado por si el encabezado no cabe en la primera muestra
+    encabezado = len(delimitador.join(map(str, columnas)).encode(encoding)) + 1
+    for numero, bloque in enumerate(bloques):
+        if numero and (ancho or time.perf_counter() > limite):
+            break
+        texto = bytes(bloque).decode(encoding, errors='replace')
+        # ..la última línea puede estar cortada por el tamaño de la muestra
+        recortado = texto if completo else texto[:texto.rfind('\n') + 1]
+        if not recortado:
+            continue
+        try:
+            if numero == 0:
+                df, recortado = leer_texto(recortado, encoding, delimitador, comillas, opciones)
+                encabezado = len(bloque) * (recortado.find('\n') + 1) / len(texto)
+            else:
+                # ..un rango que empieza dentro de un campo entre comillas puede no calzar: se descarta
+                df, recortado = leer_texto(
+                    recortado, encoding, delimitador, comillas,
+                    {**opciones, 'header': None, 'names': columnas, 'on_bad_lines': 'skip'}
+                )
+        except (pd.errors.ParserError, ValueError):
+            if numero == 0:
+                raise
+            continue
+        partes.append(df)
+        cubiertos += len(bloque) * len(recortado) / len(texto) - (encabezado if numero == 0 else 0)
+    return columnas, partes, cubiertos, encabezado, completo
+
+def muestra_excel(archivo, limite):
+    """Primeras filas de la primera hoja de un Excel; (DataFrame, filas estimadas, exacta)"""
+    if not motor.es_excel(archivo):
+        # ..un .xls (a lo más 65.536 filas) se lee completo con pandas
+        df = motor.leer_excel(archivo)
+        return df, len(df), True
+
+    partes = []
+    filas = fraccion = 0
+    bloques = motor.leer_excel_en_bloques(archivo, BLOQUE_EXCEL)
+    exacta = True
+    for bloque, fraccion in bloques:
+        partes.append(bloque)
+        filas += len(bloque)
+        if filas >= FILAS_EXCEL or time.perf_counter() > limite:
+            exacta = False
+            break
+    bloques.close()
+    df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+    if exacta or not fraccion:
+        return df, filas, exacta
+    return df, round(filas / fraccion), False
+
+#...................................................... | ESTIMACIÓN
+def estimar(archivo, variante, encoding=None, delimitador=None, comillas=motor.COMILLAS,
+            presupuesto=PRESUPUESTO_SEGUNDOS):
+    """
+    Estimación de un CSV (ruta o entrada.ArchivoMapeado, con encoding y
+    delimitador ya detectados) o de un Excel, con las reglas de variante,
+    en aproximadamente presupuesto segundos. Devuelve una Estimacion.
+    """
+    if motor.es_csv(archivo) and not isinstance(archivo, ArchivoMapeado):
+        with ArchivoMapeado(archivo) as mapeado:
+            return estimar(mapeado, variante, encoding, delimitador, comillas, presupuesto)
+
+    inicio = time.perf_counter()
+    fin = inicio + presupuesto
+    with instrumentacion.etapa('vista_previa', archivo=Path(str(archivo)).name, variante=variante.nombre) as medicion:
+        if motor.es_csv(archivo):
+            columnas, partes, cubiertos, encabezado, exacta = muestras_csv(
+                archivo, encoding, delimitador, comillas, variante.opciones_lectura,
+                inicio + presupuesto * FRACCION_LECTURA
+            )
+            # ..sólo pasa si el archivo no cabe en la muestra; leído completo, un CSV sin filas tiene 0
+            if not exacta and not any(len(parte) for parte in partes):
+                raise ValueError(
+                    f"Ninguna muestra de {Path(str(archivo)).name} tiene filas completas (filas de más de "
+                    f"{TAMANO_MUESTRA >> 10} KB); no se puede estimar ({len(columnas)} columnas)"
+                )
+            muestra = pd.concat(partes, ignore_index=True)
+            # ..las primeras filas del archivo, o de la primera muestra con filas completas
+            primeras = partes[0]
+            if exacta or not len(muestra):
+                filas = len(muestra)
+            else:
+                filas = round((archivo.tamano - encabezado) * len(muestra) / cubiertos)
+            medicion['bytes_leidos'] = round(cubiertos + encabezado)
+        else:
+            muestra, filas, exacta = muestra_excel(archivo, inicio + presupuesto * FRACCION_LECTURA)
+            primeras = muestra
+
+        # ..la clase de cada columna decide cómo se normaliza; las variantes sin clases se informan igual
+        normalizada = variante.normalizar_encabezados(muestra.copy())
+        clases = variante.clasificar(normalizada) or procesador.clasificar_columnas(normalizada)
+        normalizar_datos = variante.preparar(normalizada, clases)
+
+        # ..partes repartidas en la muestra hasta agotar el presupuesto (al menos una); las
+        # etapas de cada columna no se registran, sólo la vista previa completa
+        medidas = segundos = 0.0
+        orden = np.random.default_rng(0).permutation(len(normalizada))
+        with instrumentacion.sin_registro():
+            vista = normalizar_datos(variante.normalizar_encabezados(primeras.head(FILAS_VISTA).copy()))
+            for desde in range(0, min(len(orden), FILAS_MEDIDAS), FILAS_PARTE):
+                parte = normalizada.iloc[np.sort(orden[desde:desde + FILAS_PARTE])].copy()
+                comienzo = time.perf_counter()
+                normalizar_datos(parte)
+                segundos += time.perf_counter() - comienzo
+                medidas += len(parte)
+                if time.perf_counter() > fin:
+                    break
+
+        por_fila = muestra.memory_usage(deep=True, index=False).sum() / max(len(muestra), 1)
+        medicion['filas'] = len(muestra)
+        return Estimacion(
+            filas=filas,
+            exacta=exacta,
+            clases=clases,
+            memoria_mb=por_fila * filas / (1 << 20),
+            segundos=segundos / medidas * filas if medidas else 0.0,
+            vista=vista,
+            muestra=muestra,
+            segundos_analisis=time.perf_counter() - inicio
+        )
+
+#...................................................... | END